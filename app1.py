@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
-import re
-import io
 import plotly.express as px
+import os
 import uuid
+from cache import ResultCache
+from export import PARQUET_AVAILABLE
+from history import HistoryIndex
+from jobs import ACTIVE_STATES, JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_QUEUED, JobLimitError, JobManager, collect_artifacts
+from pipeline import build_outputs, build_plain_export, filter_rows, page_rows, record_history
+from processing import default_worker_count, file_cache_key
+from profiling import PROFILE_MODES
 
 # ==========================================
 # 1. AYARLAR VE STİL
@@ -41,138 +47,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ==========================================
-# 2. YARDIMCI FONKSİYONLAR
-# ==========================================
-
-def make_columns_unique(columns):
-    seen = {}
-    new_columns = []
-    for col in columns:
-        col_str = str(col).strip()
-        if not col_str or col_str.lower() in ['nan', 'none', '']:
-            col_str = "Unknown_Col"
-        if col_str in seen:
-            seen[col_str] += 1
-            new_col = f"{col_str}.{seen[col_str]}"
-        else:
-            seen[col_str] = 0
-            new_col = col_str
-        new_columns.append(new_col)
-    return new_columns
-
-def find_and_set_header(raw_df):
-    search_limit = min(30, len(raw_df))
-    target_keywords = ["MB/L NO", "BOOKING NO", "POL", "POD", "VOL", "V/V", "CONTAINER", "CNTR"]
-    header_idx = -1
-    max_score = 0
-    for i in range(search_limit):
-        row_values = " ".join([str(val).upper() for val in raw_df.iloc[i].values])
-        score = sum(1 for keyword in target_keywords if keyword in row_values)
-        if score > max_score:
-            max_score = score
-            header_idx = i
-    if header_idx != -1:
-        new_header = raw_df.iloc[header_idx]
-        df = raw_df.iloc[header_idx + 1:].copy()
-        df.columns = make_columns_unique(new_header)
-        return df
-    return None
-
-def extract_container_from_full_row(row):
-    row_str = " ".join([str(val).upper() for val in row.values])
-    row_str = row_str.replace('/', ' ').replace(',', ' ').replace('&', ' ').replace(';', ' ').replace('-', ' ').replace(':', ' ')
-    matches = re.findall(r'\b[A-Z]{4}\s*\d{5,8}\b', row_str)
-    valid_containers = []
-    for m in matches:
-        clean_m = m.replace(" ", "").replace("\t", "")
-        if 9 <= len(clean_m) <= 12:
-            valid_containers.append(clean_m)
-    return valid_containers
-
-def extract_volume_from_full_row(row):
-    row_str = " ".join([str(val).upper() for val in row.values])
-    types = set()
-    if re.search(r'40\s*(HC|HQ|H/C)', row_str): types.add("40HC")
-    if re.search(r'45\s*(HC|HQ|FT|\'|")', row_str): types.add("45HC")
-    if re.search(r'20\s*(DC|GP|DV|ST|FT|\'|")', row_str): types.add("20DC")
-    if re.search(r'40\s*(DC|GP|DV|ST)', row_str): types.add("40DC")
-    elif re.search(r'40\s*(\'|")', row_str) and "40HC" not in types: types.add("40DC")
-    if len(types) > 1: return "⚠️ ŞÜPHELİ (KARIŞIK TİP)"
-    elif len(types) == 1: return list(types)[0]
-    else: return ""
-
-def extract_vessel_info_smart(row, current_v_v_col):
-    for val in row.values:
-        val_str = str(val).strip()
-        if "=>" in val_str: return val_str 
-    if current_v_v_col:
-        val = str(row[current_v_v_col]).strip()
-        if val.upper() not in ['NAN', 'NONE', '']: return val
-    return ""
-
-def clean_mbl_column(val):
-    return str(val).upper().strip().replace(" ", "")
-
-def process_smart_rows(df):
-    mbl_col_name = next((c for c in df.columns if "MB/L" in str(c).upper() or "MASTER" in str(c).upper()), None)
-    vv_col_name = next((c for c in df.columns if "V/V" in str(c).upper() or "VESSEL" in str(c).upper()), None)
-    
-    new_rows = []
-    skipped_rows = [] 
-    
-    for _, row in df.iterrows():
-        if row.astype(str).str.strip().replace(['NAN', 'NONE', ''], pd.NA).isna().all():
-            continue
-
-        input_row_id = str(uuid.uuid4()) 
-        
-        mbl_val = ""
-        if mbl_col_name:
-            raw_mbl = str(row[mbl_col_name]).upper().strip()
-            if raw_mbl not in ['NAN', 'NONE', '', 'NA', 'UNKNOWN_COL']:
-                mbl_val = clean_mbl_column(raw_mbl)
-        
-        containers = extract_container_from_full_row(row)
-        ctype = extract_volume_from_full_row(row)
-        vessel_val = extract_vessel_info_smart(row, vv_col_name)
-
-        if mbl_val and containers:
-            for cntr in containers:
-                teu_val = ''
-                if "ŞÜPHELİ" in ctype: teu_val = ""
-                elif '40' in ctype or '45' in ctype: teu_val = 2
-                elif '20' in ctype: teu_val = 1
-
-                row_data = {
-                    "INPUT_ROW_ID": input_row_id, 
-                    "MB/L NO": mbl_val,
-                    "CNTR NO": cntr,
-                    "VOL": ctype if ctype else "Unknown", 
-                    "TEU": teu_val,
-                    "V/V": vessel_val
-                }
-                for col in ["POL", "POD", "BOOKING NO"]:
-                     actual_col = next((c for c in df.columns if col in str(c).upper()), None)
-                     if actual_col: row_data[col] = str(row[actual_col])
-                new_rows.append(row_data)
-        
-        else:
-            row_dict = row.to_dict()
-            if not mbl_val and not containers:
-                row_dict['HATA_NEDENI'] = "MBL VE KONTEYNER NO BULUNAMADI"
-            elif not mbl_val:
-                row_dict['HATA_NEDENI'] = "EKSİK MBL NO"
-            else:
-                row_dict['HATA_NEDENI'] = "EKSİK KONTEYNER NO"
-            
-            row_dict['BULUNAN_MBL'] = mbl_val if mbl_val else "YOK"
-            row_dict['BULUNAN_CNTR'] = ", ".join(containers) if containers else "YOK"
-            skipped_rows.append(row_dict)
-
-    return pd.DataFrame(new_rows), pd.DataFrame(skipped_rows)
-
-# ==========================================
-# 3. UI - SIDEBAR VE HEADER
+# 2. UI - SIDEBAR VE HEADER
 # ==========================================
 
 with st.sidebar:
@@ -183,180 +58,171 @@ with st.sidebar:
     2. **Başlat:** Sistem taramaya başlar.
     3. **Sonuçlar:** - **Tam Liste:** Birleştirilmiş tüm liste.
         - **Tmaxx Listesi:** Her sayfa için ayrı yükleme listesi.
-        - **Hata Listesi:** MBL/Konteyneri bulunamayanlar, mükerrer geçenler veya uzunluğu hatalı olan konteynerler.
+        - **Hata Listesi:** MBL/Konteyneri bulunamayanlar, mükerrer geçenler, uzunluğu hatalı veya kontrol hanesi tutmayan konteynerler.
     """)
     st.markdown("---")
+    parallel_mode = st.toggle("⚡ Paralel İşleme", value=False, help="Dosya ve sayfaları birden fazla CPU çekirdeğine dağıtır. Çok sayıda dosya/sayfa yüklerken hızlandırır.")
+    worker_count = st.number_input("İşlemci Sayısı", min_value=2, max_value=max(2, default_worker_count()), value=max(2, default_worker_count()), disabled=not parallel_mode)
+    history_mode = st.toggle("📚 Geçmiş Kontrolü", value=True, help="Konteyner ve MBL numaralarını daha önce kaydedilen yüklemelerle karşılaştırır.")
+    with st.expander("🔬 Performans Ölçümü"):
+        trace_memory = st.toggle("Aşama Bellek Ölçümü", value=False, help="Her aşamanın tepe bellek kullanımını tracemalloc ile ölçer. İşlemi yavaşlatır.")
+        profile_mode = st.selectbox("Profil", ["Kapalı"] + PROFILE_MODES, help="Analizi cProfile/pyinstrument altında çalıştırır. Sadece analiz iş parçacığını kapsar; paralel modda işçi süreçleri görünmez.")
+    st.markdown("---")
     st.caption("v3.3 - Tmaxx CSV formatı noktalı virgül ve başlıksız olarak güncellendi")
 
 st.title("🚢 Lojistik Operasyon Asistanı")
 st.markdown("Dağınık Excel dosyalarını birleştirir, **eksik, mükerrer ve hatalı konteyner kayıtlarını kontrol ederek temizler** ve yüklemeye hazırlar.")
 
 # ==========================================
-# 4. SESSION STATE VE DOSYA İŞLEME
+# 3. SESSION STATE VE DOSYA İŞLEME
 # ==========================================
 
-if 'processed_data' not in st.session_state:
-    st.session_state['processed_data'] = None
-    st.session_state['skipped_data'] = None 
-    st.session_state['report_stats'] = {} 
-if 'excel_bytes' not in st.session_state: st.session_state['excel_bytes'] = None
-if 'skipped_bytes' not in st.session_state: st.session_state['skipped_bytes'] = None 
-if 'tmaxx_files' not in st.session_state: st.session_state['tmaxx_files'] = {}
+@st.cache_resource
+def get_result_cache():
+    # Tüm oturumlarca paylaşılır. LOJISTIK_CACHE_DIR verilirse önbellek diskte tutulur.
+    max_mb = int(os.environ.get("LOJISTIK_CACHE_MAX_MB", "512"))
+    return ResultCache(max_bytes=max_mb * 1024 * 1024, directory=os.environ.get("LOJISTIK_CACHE_DIR"))
+
+@st.cache_resource
+def get_history_index():
+    # Tüm oturumlarca paylaşılan kalıcı konteyner/MBL geçmişi (SQLite).
+    retention_days = int(os.environ.get("LOJISTIK_HISTORY_DAYS", "90"))
+    return HistoryIndex(os.environ.get("LOJISTIK_HISTORY_DB", "lojistik_gecmis.sqlite"), retention_days=retention_days)
+
+@st.cache_resource
+def get_job_manager():
+    # Tüm oturumlarca paylaşılan arka plan analiz kuyruğu (bkz. jobs.py).
+    return JobManager(max_running=int(os.environ.get("LOJISTIK_MAX_JOBS", "2")),
+                      max_per_owner=int(os.environ.get("LOJISTIK_MAX_JOBS_PER_USER", "1")),
+                      max_pending=int(os.environ.get("LOJISTIK_MAX_PENDING_JOBS", "10")))
+
+@st.fragment(run_every=1.0)
+def show_job_progress(job_id):
+    # Sadece bu parça saniyede bir yeniden çizilir; iş bitince sonucu almak için tüm sayfa yenilenir.
+    manager = get_job_manager()
+    status = manager.status(job_id)
+    if status is None or status['status'] not in ACTIVE_STATES:
+        st.rerun()
+    if status['status'] == JOB_QUEUED:
+        st.info(f"⏳ Analiz sırada ({status['queue_position']}. sıra). Sayfayı kapatsanız da iş sürer; aynı adresle geri dönebilirsiniz.")
+        if st.button("✖️ İptal Et", key="cancel_job"):
+            manager.cancel(job_id)
+            st.rerun()
+        return
+    total = status['total']
+    stage = "Taranıyor" if status['stage'] == "okuma" else "Çıktılar hazırlanıyor"
+    st.progress(status['done'] / total if total else 0.0, text=f"{stage}: {status['done']}/{total} • {status['elapsed']:.0f} sn")
+    for file_name, file_done, file_total in status['files']:
+        finished = file_total > 0 and file_done >= file_total
+        st.caption(f"{'✅' if finished else '⏳'} {file_name}" + (f" ({file_done}/{file_total} sayfa)" if file_total > 1 else ""))
+
+# Oturumda sadece sıkıştırılmış PipelineResult tutulur; Excel/Tmaxx çıktıları analiz işinde
+# üretilip 'exports' altında saklanır, görüntülenen liste için ayrı kopya tutulmaz.
+# Yeniden çizimlerde tam çerçeve taranmaz: metrik ve grafikler result.aggregates'ten, liste
+# sekmesi 'list_filter' altında saklanan satır konumlarından sayfa sayfa okunur.
+LIST_PAGE_SIZES = [100, 500, 1000]
+if 'pipeline_result' not in st.session_state: st.session_state['pipeline_result'] = None
+if 'exports' not in st.session_state: st.session_state['exports'] = {}
+if 'session_id' not in st.session_state: st.session_state['session_id'] = uuid.uuid4().hex
+# Analiz arka planda çalışır; iş kimliği adreste de tutulur ki sekme kapanıp açılınca iş geri bağlansın.
+if 'job_id' not in st.session_state: st.session_state['job_id'] = st.query_params.get("job")
+
+def forget_job():
+    st.session_state['job_id'] = None
+    st.query_params.pop("job", None)
+
+def upload_hashes(files):
+    # file_id -> içerik hash'i. Her yeniden çalıştırmada sadece yeni yüklenen dosyalar hash'lenir;
+    # listeden çıkarılan dosyaların kayıtları atılır.
+    known = st.session_state.get('upload_hashes', {})
+    hashes = {f.file_id: known.get(f.file_id) or file_cache_key(f.getvalue()) for f in files}
+    st.session_state['upload_hashes'] = hashes
+    return hashes
 
 uploaded_files = st.file_uploader("📂 Excel Dosyalarını Buraya Bırakın", type=["xlsx", "xls"], accept_multiple_files=True)
+st.caption("Yüklenen listeler tümüyle bellekte işlenir. Yüz binlerce satırlık listeler için komut satırındaki akış modunu "
+           "kullanın: `python cli.py liste.xlsx -o cikti/ --stream`")
 
-if uploaded_files and st.session_state.get('last_uploaded_files') != uploaded_files:
-    st.session_state['processed_data'] = None
-    st.session_state['last_uploaded_files'] = uploaded_files
-
+# Yükleme nesnesi değil içerik karşılaştırılır: aynı dosyaların tekrar bırakılması sonucu silmez.
 if uploaded_files:
-    if st.session_state['processed_data'] is None:
-        if st.button("🚀 Analizi Başlat", type="primary"): 
-            
-            with st.spinner("Dosyalar okunuyor, kontroller yapılıyor..."):
-                all_dfs = []
-                all_skipped_dfs = [] 
-                my_bar = st.progress(0, text="Başlıyor...")
-
-                for i, uploaded_file in enumerate(uploaded_files):
-                    try:
-                        xls = pd.read_excel(uploaded_file, sheet_name=None, header=None, dtype=str)
-                        for sheet_name, raw_df in xls.items():
-                            df = find_and_set_header(raw_df)
-                            if df is not None:
-                                processed_df, skipped_df = process_smart_rows(df)
-                                if not processed_df.empty:
-                                    processed_df['KAYNAK_DOSYA'] = uploaded_file.name
-                                    processed_df['KAYNAK_SAYFA'] = sheet_name
-                                    all_dfs.append(processed_df)
-                                if not skipped_df.empty:
-                                    skipped_df['KAYNAK_DOSYA'] = uploaded_file.name
-                                    skipped_df['KAYNAK_SAYFA'] = sheet_name
-                                    all_skipped_dfs.append(skipped_df)
-                    except Exception as e:
-                        st.error(f"Hata ({uploaded_file.name}): {e}")
-                    my_bar.progress((i + 1) / len(uploaded_files), text=f"Taranıyor: {uploaded_file.name}")
-
-                if all_dfs:
-                    final_df = pd.concat(all_dfs, ignore_index=True).fillna('')
-                    final_skipped_df = pd.concat(all_skipped_dfs, ignore_index=True).fillna('') if all_skipped_dfs else pd.DataFrame()
-
-                    raw_count = len(final_df)
-                    final_df['IS_CNTR_DUPLICATE'] = final_df.duplicated(subset=['CNTR NO'], keep=False)
-                    mbl_row_counts = final_df.groupby('MB/L NO')['INPUT_ROW_ID'].nunique()
-                    duplicate_mbls = mbl_row_counts[mbl_row_counts > 1].index
-                    final_df['IS_MBL_DUPLICATE'] = final_df['MB/L NO'].isin(duplicate_mbls)
-                    final_df['CLEAN_CNTR'] = final_df['CNTR NO'].astype(str).str.replace(r'\s+', '', regex=True)
-                    final_df['IS_INVALID_LENGTH'] = final_df['CLEAN_CNTR'].str.len() != 11
-                    final_df['IS_ERROR'] = final_df['IS_CNTR_DUPLICATE'] | final_df['IS_MBL_DUPLICATE'] | final_df['IS_INVALID_LENGTH']
-                    
-                    error_rows = final_df[final_df['IS_ERROR'] == True].copy()
-                    error_count = len(error_rows)
-                    
-                    if not error_rows.empty:
-                        def get_error_reason(row):
-                            reasons = []
-                            if row['IS_INVALID_LENGTH']: reasons.append("KONTEYNER NO EKSİK VEYA FAZLA")
-                            if row['IS_CNTR_DUPLICATE']: reasons.append("TEKRAR EDEN KONTEYNER")
-                            if row['IS_MBL_DUPLICATE']: reasons.append("GİRDİDE TEKRAR EDEN MBL")
-                            return " + ".join(reasons)
-                        
-                        error_rows['HATA_NEDENI'] = error_rows.apply(get_error_reason, axis=1)
-                        final_skipped_df = pd.concat([final_skipped_df, error_rows], ignore_index=True).fillna('')
-
-                    final_count = len(final_df)
-
-                    # EXCEL ÇIKTISI
-                    output_excel = io.BytesIO()
-                    with pd.ExcelWriter(output_excel, engine='xlsxwriter') as writer:
-                        df_export = final_df.drop(columns=['INPUT_ROW_ID', 'IS_CNTR_DUPLICATE', 'IS_MBL_DUPLICATE', 'IS_INVALID_LENGTH', 'CLEAN_CNTR', 'IS_ERROR'])
-                        df_export.to_excel(writer, index=False, sheet_name='Sheet1')
-                        workbook = writer.book
-                        worksheet = writer.sheets['Sheet1']
-                        format_red = workbook.add_format({'bg_color': '#FFC7CE', 'font_color': '#9C0006'})
-                        format_orange = workbook.add_format({'bg_color': '#FCE4D6', 'font_color': '#C65911'})
-                        for row_num in range(len(final_df)):
-                            if final_df['IS_INVALID_LENGTH'].iloc[row_num]:
-                                worksheet.set_row(row_num + 1, None, format_red)
-                            elif final_df['IS_CNTR_DUPLICATE'].iloc[row_num] or final_df['IS_MBL_DUPLICATE'].iloc[row_num]:
-                                worksheet.set_row(row_num + 1, None, format_orange)
-                    output_excel.seek(0)
-
-                    # SKIPPED EXCEL ÇIKTISI
-                    skipped_bytes = None
-                    if not final_skipped_df.empty:
-                        skipped_buffer = io.BytesIO()
-                        with pd.ExcelWriter(skipped_buffer, engine='xlsxwriter') as writer:
-                            df_skipped_export = final_skipped_df.drop(columns=['INPUT_ROW_ID', 'IS_CNTR_DUPLICATE', 'IS_MBL_DUPLICATE', 'IS_INVALID_LENGTH', 'CLEAN_CNTR', 'IS_ERROR'], errors='ignore')
-                            df_skipped_export.to_excel(writer, index=False, sheet_name='Hatalar')
-                            workbook = writer.book
-                            worksheet = writer.sheets['Hatalar']
-                            format_red = workbook.add_format({'bg_color': '#FFC7CE', 'font_color': '#9C0006'})
-                            format_orange = workbook.add_format({'bg_color': '#FCE4D6', 'font_color': '#C65911'})
-                            if 'HATA_NEDENI' in df_skipped_export.columns:
-                                for row_num, reason in enumerate(df_skipped_export['HATA_NEDENI']):
-                                    reason_str = str(reason)
-                                    if "EKSİK VEYA FAZLA" in reason_str:
-                                        worksheet.set_row(row_num + 1, None, format_red)
-                                    elif "TEKRAR" in reason_str:
-                                        worksheet.set_row(row_num + 1, None, format_orange)
-                        skipped_buffer.seek(0)
-                        skipped_bytes = skipped_buffer
-
-                    # TMAXX CSV ÇIKTISI (NOKTALI VİRGÜLLÜ, BAŞLIKSIZ)
-                    if "VOL" not in final_df.columns: final_df["VOL"] = ""
-                    tmaxx_files_dict = {}
-                    
-                    def get_tmaxx_err_suffix(row):
-                        errs = []
-                        if row.get('IS_CNTR_DUPLICATE', False): errs.append("CNTR TEKRAR")
-                        if row.get('IS_MBL_DUPLICATE', False): errs.append("MBL TEKRAR")
-                        if row.get('IS_INVALID_LENGTH', False): errs.append("UZUNLUK HATASI")
-                        return f" [HATA: {' + '.join(errs)}]" if errs else ""
-
-                    if 'KAYNAK_SAYFA' in final_df.columns:
-                        for sheet_name in final_df['KAYNAK_SAYFA'].unique():
-                            sheet_df = final_df[final_df['KAYNAK_SAYFA'] == sheet_name].copy()
-                            tmaxx_df = sheet_df[["CNTR NO", "VOL", "IS_CNTR_DUPLICATE", "IS_MBL_DUPLICATE", "IS_INVALID_LENGTH"]].copy()
-                            tmaxx_df['CNTR NO'] = tmaxx_df['CNTR NO'] + tmaxx_df.apply(get_tmaxx_err_suffix, axis=1)
-                            
-                            tmaxx_df = tmaxx_df[["CNTR NO", "VOL"]]
-                            tmaxx_df.columns = ['Container No', 'Container Type']
-                            tmaxx_df = tmaxx_df[tmaxx_df['Container No'] != '']
-                            
-                            if not tmaxx_df.empty:
-                                # GÜNCELLEME: Noktalı virgül (sep=';') ve Başlıksız (header=False)
-                                output_csv = tmaxx_df.to_csv(index=False, header=False, sep=';', encoding='utf-8').encode('utf-8')
-                                safe_name = str(sheet_name).replace("/", "_").replace("\\", "_")
-                                tmaxx_files_dict[f"{safe_name}.csv"] = output_csv
-
-                    display_df = final_df.drop(columns=['INPUT_ROW_ID', 'IS_CNTR_DUPLICATE', 'IS_MBL_DUPLICATE', 'IS_INVALID_LENGTH', 'CLEAN_CNTR', 'IS_ERROR'])
-
-                    st.session_state['processed_data'] = display_df
-                    st.session_state['skipped_data'] = final_skipped_df
-                    st.session_state['excel_bytes'] = output_excel
-                    st.session_state['skipped_bytes'] = skipped_bytes
-                    st.session_state['tmaxx_files'] = tmaxx_files_dict
-                    st.session_state['report_stats'] = {
-                        'skipped': len(final_skipped_df),
-                        'duplicates_and_errors': error_count,
-                        'final': final_count
-                    }
-                    
-                    my_bar.empty()
-                    st.balloons()
-                    st.rerun()
-                else:
-                    st.error("❌ Dosyalar okunamadı veya veri bulunamadı.")
+    hashes = upload_hashes(uploaded_files)
+    upload_signature = tuple((f.name, hashes[f.file_id]) for f in uploaded_files)
+else:
+    upload_signature = None
+if uploaded_files and st.session_state.get('last_upload_signature') != upload_signature:
+    st.session_state['pipeline_result'] = None
+    st.session_state['exports'] = {}
+    st.session_state['list_filter'] = None
+    st.session_state['last_upload_signature'] = upload_signature
+    if st.session_state['job_id'] is not None:
+        # Yeni dosyalar yeni analiz demektir; eski iş bırakılır: kuyruktaysa silinir, çalışıyorsa yeni
+        # analizi engellemez ve bitince sonucu saklanmaz.
+        get_job_manager().abandon(st.session_state['job_id'])
+        forget_job()
+
+job_id = st.session_state['job_id']
+if job_id is not None and st.session_state['pipeline_result'] is None:
+    manager = get_job_manager()
+    status = manager.status(job_id)
+    if status is None:
+        forget_job()
+        st.warning("Analiz işi bulunamadı; sonucu daha önce alınmış veya süresi dolmuş olabilir.")
+    elif status['status'] in ACTIVE_STATES:
+        show_job_progress(job_id)
+    else:
+        job = manager.collect(job_id)
+        forget_job()
+        result = job.result if job is not None else None
+        if result is not None:
+            for file_name, error in result.errors:
+                st.error(f"Hata ({file_name}): {error}")
+        if job is None:
+            st.warning("Analiz sonucu başka bir oturumda alındı.")
+        elif job.status == JOB_CANCELLED:
+            st.info("Analiz iptal edildi.")
+        elif job.status == JOB_FAILED:
+            st.error(f"❌ Analiz tamamlanamadı: {job.error}")
+        elif job.status == JOB_DONE and result.final_df is not None:
+            st.session_state['pipeline_result'] = result
+            st.session_state['exports'] = job.artifacts
+            st.session_state['list_filter'] = None
+            st.session_state['plain_export'] = None
+            st.session_state['history_recorded'] = False
+            st.session_state['profile_report'] = (job.options['profile_mode'], job.profile_report) if job.profile_report else None
+            st.balloons()
+        else:
+            st.error("❌ Dosyalar okunamadı veya veri bulunamadı.")
+elif uploaded_files and st.session_state['pipeline_result'] is None:
+    overview = get_job_manager().overview()
+    if overview['running'] >= overview['max_running']:
+        st.caption(f"⏳ Şu anda {overview['running']} analiz çalışıyor, {overview['queued']} analiz sırada; yeni analiz sıraya alınır.")
+    if st.button("🚀 Analizi Başlat", type="primary"):
+        try:
+            new_job_id = get_job_manager().submit(
+                st.session_state['session_id'],
+                [(f.name, f.getvalue()) for f in uploaded_files],
+                max_workers=worker_count if parallel_mode else 1,
+                cache=get_result_cache(),
+                history=get_history_index() if history_mode else None,
+                trace_memory=trace_memory,
+                profile_mode=None if profile_mode == "Kapalı" else profile_mode,
+            )
+        except JobLimitError as e:
+            st.warning(str(e))
+        else:
+            st.session_state['job_id'] = new_job_id
+            st.query_params["job"] = new_job_id
+            st.rerun()
 
 # ==========================================
-# 5. RAPORLAMA VE İNDİRME ALANI
+# 4. RAPORLAMA VE İNDİRME ALANI
 # ==========================================
 
-if st.session_state['processed_data'] is not None:
-    stats = st.session_state['report_stats']
-    final_df = st.session_state['processed_data']
-    suspicious_count = len(final_df[final_df['VOL'] == "⚠️ ŞÜPHELİ (KARIŞIK TİP)"]) if 'VOL' in final_df.columns else 0
+if st.session_state['pipeline_result'] is not None:
+    result = st.session_state['pipeline_result']
+    stats = result.stats
+    aggregates = result.aggregates
+    suspicious_count = aggregates['suspicious']
     
     st.write("")
     c1, c2, c3, c4 = st.columns(4)
@@ -365,52 +231,135 @@ if st.session_state['processed_data'] is not None:
     c3.metric("Toplam Hatalı Veri", stats['skipped'], "⚠️ İncele" if stats['skipped'] > 0 else "Temiz", delta_color="inverse" if stats['skipped'] > 0 else "normal")
     c4.metric("Tip Belirsiz Kayıt", suspicious_count, "Manuel Kontrol" if suspicious_count > 0 else "Temiz", delta_color="inverse" if suspicious_count > 0 else "normal")
     
+    if result.perf is not None and result.perf.records:
+        with st.expander("📈 Performans"):
+            st.caption("Aşama bazında toplam süre, işlenen satır ve bellek. Çıktı hazırlama aşamaları, indirme dosyaları hazırlandıkça eklenir.")
+            st.dataframe(result.perf.summary().rename(columns={
+                'stage': 'Aşama', 'seconds': 'Süre (sn)', 'rows': 'Satır', 'calls': 'Adım', 'peak_mb': 'Aşama Tepe (MB)',
+                'max_rss_mb': 'Süreç Tepe (MB)', 'rows_per_second': 'Satır/sn'}).round(3), use_container_width=True, hide_index=True)
+            st.markdown("**Dosya / Sayfa Ayrıntısı**")
+            st.dataframe(result.perf.to_frame().rename(columns={
+                'stage': 'Aşama', 'file': 'Dosya', 'sheet': 'Sayfa', 'rows': 'Satır', 'seconds': 'Süre (sn)',
+                'peak_mb': 'Aşama Tepe (MB)', 'max_rss_mb': 'Süreç Tepe (MB)'}).round(3), use_container_width=True, hide_index=True)
+            if result.parse_timings:
+                st.markdown("**Okuma Motorları**")
+                st.dataframe(pd.DataFrame([
+                    {'Dosya': t['file'], 'Motor': t['engine'], 'Sayfa': len(t['sheets']), 'Süre (sn)': round(t['seconds'], 3)}
+                    for t in result.parse_timings
+                ]), use_container_width=True, hide_index=True)
+            st.download_button(label="📥 Performans Raporu (JSON)", data=result.perf.to_json(stats=stats, parse_timings=result.parse_timings),
+                               file_name="PERFORMANS.json", mime="application/json")
+            profile = st.session_state.get('profile_report')
+            if profile:
+                st.markdown(f"**Profil ({profile[0]})**")
+                st.code(profile[1], language=None)
+                st.download_button(label="📥 Profil Raporu", data=profile[1], file_name=f"PROFIL_{profile[0]}.txt", mime="text/plain")
+
     st.markdown("---")
 
     if stats['duplicates_and_errors'] > 0:
-        st.error(f"🚨 DİKKAT: İşlenen verilerde {stats['duplicates_and_errors']} adet mükerrer veya hatalı uzunlukta kayıt bulundu! Çıktılarda işaretlenmiştir.")
+        st.error(f"🚨 DİKKAT: İşlenen verilerde {stats['duplicates_and_errors']} adet mükerrer, hatalı uzunlukta veya kontrol hanesi hatalı kayıt bulundu! Çıktılarda işaretlenmiştir.")
+
+    if stats.get('history_matches'):
+        st.warning(f"📚 {stats['history_matches']} satırda daha önce yüklenmiş konteyner veya MBL numarası var.")
+        with st.expander("📚 Daha Önce Yüklenmiş Numaralar"):
+            st.dataframe(result.history_matches, use_container_width=True, hide_index=True)
+
+    if history_mode:
+        if st.session_state.get('history_recorded'):
+            st.caption("✅ Bu yükleme geçmişe kaydedildi.")
+        elif st.button("📚 Bu Yüklemeyi Geçmişe Kaydet", help="Sonraki yüklemeler bu dosyalardaki konteyner ve MBL numaralarına karşı kontrol edilir."):
+            added = record_history(result, get_history_index())
+            st.session_state['history_recorded'] = True
+            st.toast(f"{added} yeni numara geçmişe eklendi.")
+            st.rerun()
 
     tab1, tab2, tab3 = st.tabs(["📊 Grafikler ve Bilgi", "📥 İndir", "👀 Liste"])
 
     with tab1:
-        if not final_df.empty:
+        if stats['final'] > 0:
             col_info, col_graph2 = st.columns([1.5, 2])
             with col_info:
                 st.subheader("🎨 Excel Çıktıları Renk Kodları")
                 st.info("İndireceğiniz **Excel dosyalarındaki** satırlar, içerdiği hata tipine göre otomatik renklendirilir:")
                 st.markdown("""
-                <div><span class="color-box red-box"></span> <b>Kırmızı:</b> Konteyner No Eksik veya Fazla (11 Hane Değil)</div>
-                <div style="margin-top: 10px;"><span class="color-box orange-box"></span> <b>Turuncu:</b> Mükerrer (Tekrar Eden) Kayıt</div>
+                <div><span class="color-box red-box"></span> <b>Kırmızı:</b> Konteyner No Eksik veya Fazla (11 Hane Değil) ya da ISO 6346 Kontrol Hanesi Hatalı</div>
+                <div style="margin-top: 10px;"><span class="color-box orange-box"></span> <b>Turuncu:</b> Mükerrer (Tekrar Eden) veya Daha Önce Yüklenmiş Kayıt</div>
                 <br>
-                <small><em>* İpucu: Bir satırda hem mükerrer hem uzunluk hatası varsa, kırmızı renk (uzunluk hatası) öncelikli gösterilir.</em></small>
+                <small><em>* İpucu: Bir satırda hem mükerrer hem uzunluk/kontrol hanesi hatası varsa, kırmızı renk öncelikli gösterilir.</em></small>
                 """, unsafe_allow_html=True)
+                error_counts = {reason: count for reason, count in aggregates['error_counts'].items() if count}
+                if error_counts:
+                    st.markdown("**Hata Türleri** (bir satır birden fazla türde olabilir)")
+                    st.dataframe(pd.DataFrame({'Hata': list(error_counts), 'Satır': list(error_counts.values())}), use_container_width=True, hide_index=True)
             with col_graph2:
                 st.subheader("Konteyner Tipleri")
-                plot_df = final_df.copy()
-                plot_df['VOL'] = plot_df['VOL'].replace('', 'Belirsiz')
-                fig_vol = px.bar(plot_df['VOL'].value_counts().reset_index(), x='VOL', y='count', title='Tip Dağılımı', labels={'count':'Adet', 'VOL':'Tip'})
+                vol_counts = pd.Series(aggregates['volume_counts'], name='count').rename(index={'': 'Belirsiz'})
+                fig_vol = px.bar(vol_counts.rename_axis('VOL').reset_index(), x='VOL', y='count', title='Tip Dağılımı', labels={'count':'Adet', 'VOL':'Tip'})
                 st.plotly_chart(fig_vol, key="chart2", use_container_width=True)
 
     with tab2:
         st.subheader("Dosyaları Al")
-        col_d1, col_d2, col_d3 = st.columns(3)
-        with col_d1:
-            st.download_button(label="📥 1. Temiz Birleştirilmiş Liste (Excel)", data=st.session_state['excel_bytes'], file_name="BIRLESTIRILMIS_LISTE.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        with col_d2:
-            st.markdown("##### 📤 2. Tmaxx Dosyaları (CSV - Başlıksız & Noktalı Virgüllü)")
-            if st.session_state['tmaxx_files']:
-                for file_name, file_bytes in st.session_state['tmaxx_files'].items():
-                    st.download_button(label=f"📥 {file_name}", data=file_bytes, file_name=file_name, mime="text/csv", key=f"dl_btn_{file_name}")
-        with col_d3:
-            if st.session_state['skipped_bytes']:
-                st.download_button(label="⚠️ 3. Hatalı Kayıtlar", data=st.session_state['skipped_bytes'], file_name="HATALI_KAYITLAR.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-            else:
-                st.success("Hata yok! Harika! 🎉")
+        exports = st.session_state['exports']
+        # Çıktılar analiz işinde hazırlanır; sadece eksikse (ör. iş çıktısız döndüyse) burada üretilir.
+        if not exports:
+            if st.button("📦 İndirme Dosyalarını Hazırla", type="primary", key="prepare_exports"):
+                with st.spinner("Excel ve Tmaxx dosyaları hazırlanıyor..."):
+                    exports.update(collect_artifacts(build_outputs(result)))
+        if exports:
+            col_d1, col_d2, col_d3 = st.columns(3)
+            with col_d1:
+                st.download_button(label="📥 1. Temiz Birleştirilmiş Liste (Excel)", data=exports['excel'], file_name="BIRLESTIRILMIS_LISTE.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            with col_d2:
+                st.markdown("##### 📤 2. Tmaxx Dosyaları (CSV - Başlıksız & Noktalı Virgüllü)")
+                if exports['tmaxx_files']:
+                    # Sayfa başına buton yerine tek ZIP + seçilen tek dosya: her yeniden çizimde sadece iki buton.
+                    st.download_button(label=f"📦 Tümü ({len(exports['tmaxx_files'])} dosya, ZIP)", data=exports['tmaxx_zip'], file_name="TMAXX_LISTELERI.zip", mime="application/zip", key="dl_btn_tmaxx_zip")
+                    tmaxx_choice = st.selectbox("Tek dosya", list(exports['tmaxx_files'].keys()), key="tmaxx_choice")
+                    st.download_button(label=f"📥 {tmaxx_choice}", data=exports['tmaxx_files'][tmaxx_choice], file_name=tmaxx_choice, mime="text/csv", key="dl_btn_tmaxx_single")
+            with col_d3:
+                if exports['skipped_excel']:
+                    st.download_button(label="⚠️ 3. Hatalı Kayıtlar", data=exports['skipped_excel'], file_name="HATALI_KAYITLAR.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                else:
+                    st.success("Hata yok! Harika! 🎉")
+
+        with st.expander("📄 Renksiz Çıktı (CSV / Parquet) - Diğer Sistemler İçin"):
+            plain_format = st.radio("Format", ["CSV", "Parquet"] if PARQUET_AVAILABLE else ["CSV"], horizontal=True)
+            if st.button("Hazırla", key="prepare_plain_export"):
+                plain_bytes = build_plain_export(result, plain_format.lower())
+                st.session_state['plain_export'] = (plain_format, plain_bytes)
+            plain_export = st.session_state.get('plain_export')
+            if plain_export and plain_export[0] == plain_format:
+                extension = "csv" if plain_format == "CSV" else "parquet"
+                mime = "text/csv" if plain_format == "CSV" else "application/octet-stream"
+                st.download_button(label=f"📥 BIRLESTIRILMIS_LISTE.{extension}", data=plain_export[1], file_name=f"BIRLESTIRILMIS_LISTE.{extension}", mime=mime)
 
     with tab3:
-        st.dataframe(final_df, use_container_width=True)
+        col_query, col_errors, col_size = st.columns([3, 1, 1])
+        query = col_query.text_input("🔍 Konteyner / MBL Ara", key="list_query", placeholder="ör. MSCU1234567 veya MBL numarasının bir kısmı")
+        errors_only = col_errors.toggle("Sadece Hatalılar", key="list_errors_only")
+        page_size = col_size.selectbox("Satır / Sayfa", LIST_PAGE_SIZES, key="list_page_size")
+        # Filtre sadece sorgu değişince çalışır; sonraki çizimler saklanan konumlardan tek sayfa okur.
+        filter_key = (query.strip().upper(), errors_only)
+        list_filter = st.session_state.get('list_filter')
+        if list_filter is None or list_filter[0] != filter_key:
+            list_filter = (filter_key, filter_rows(result.final_df, query, errors_only))
+            st.session_state['list_filter'] = list_filter
+            st.session_state['list_page'] = 1
+        positions = list_filter[1]
+        page_count = max(1, -(-len(positions) // page_size))
+        if st.session_state.get('list_page', 1) > page_count:
+            st.session_state['list_page'] = page_count
+        page = st.number_input(f"Sayfa (toplam {page_count})", min_value=1, max_value=page_count, step=1, key="list_page")
+        if len(positions):
+            first = (page - 1) * page_size
+            st.caption(f"{len(positions)} kayıttan {first + 1}–{min(first + page_size, len(positions))} arası gösteriliyor.")
+            st.dataframe(page_rows(result, positions, page, page_size), use_container_width=True)
+        else:
+            st.info("Aramaya uyan kayıt bulunamadı.")
     
     st.markdown("---")
     if st.button("🔄 Yeni İşlem Başlat"):
         for key in st.session_state.keys(): del st.session_state[key]
+        st.query_params.clear()
         st.rerun()
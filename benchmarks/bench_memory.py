@@ -0,0 +1,100 @@
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+import uuid
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import HELPER_COLUMNS, compact_frame, validate
+from processing import FLAG_INVALID_CHECK_DIGIT
+
+# ==========================================
+# SENTETİK İŞLENMİŞ SAYFALAR
+# ==========================================
+# process_file çıktısıyla aynı şema; okuma adımı atlanır, sadece birleştirme sonrası
+# oturumda tutulan çerçevelerin boyutu ölçülür.
+
+def random_container(rnd):
+    owner = ''.join(rnd.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(3)) + 'U'
+    return owner + str(rnd.randint(0, 9999999)).zfill(7)
+
+def make_sheet_frames(rows, sheets, seed=42):
+    rnd = random.Random(seed)
+    volumes = ['40HC', '20DC', '40DC', '45HC', 'Unknown', "⚠️ ŞÜPHELİ (KARIŞIK TİP)"]
+    vessels = ['MSC ANNA => MSC LENA', 'MAERSK 123W', 'CMA CGM TAGE 0FL3', '']
+    ports = ['ISTANBUL', 'MERSIN', 'IZMIT', 'HAMBURG', 'ROTTERDAM', 'ANTWERP']
+    per_sheet = rows // sheets
+    frames = []
+    for s in range(sheets):
+        containers = [random_container(rnd) for _ in range(per_sheet)]
+        ctype = [rnd.choice(volumes) for _ in range(per_sheet)]
+        frames.append(pd.DataFrame({
+            'INPUT_ROW_ID': np.arange(per_sheet) + s * per_sheet,
+            'MB/L NO': [f"MBL{rnd.randint(0, rows // 3):08d}" for _ in range(per_sheet)],
+            'CNTR NO': containers,
+            'VOL': ctype,
+            'TEU': [2 if v.startswith('4') else 1 if v.startswith('2') else "" for v in ctype],
+            'V/V': [rnd.choice(vessels) for _ in range(per_sheet)],
+            'POL': [rnd.choice(ports) for _ in range(per_sheet)],
+            'POD': [rnd.choice(ports) for _ in range(per_sheet)],
+            'ERROR_FLAGS': np.where(np.array([rnd.random() < 0.02 for _ in range(per_sheet)]), FLAG_INVALID_CHECK_DIGIT, 0).astype(np.uint8),
+            'KAYNAK_DOSYA': f"YUKLEME_LISTESI_{s // 4:03d}.xlsx",
+            'KAYNAK_SAYFA': f"SAYFA {s % 4}",
+        }))
+    return frames
+
+# ==========================================
+# ESKİ VE SIKIŞTIRILMIŞ GÖSTERİM
+# ==========================================
+
+def legacy_session(frames):
+    # Eski düzen: object sütunlar, UUID satır kimliği, ayrı bool bayraklar, CLEAN_CNTR ve
+    # oturumda ayrıca tutulan yardımcı sütunsuz görüntü kopyası.
+    final_df = pd.concat(frames, ignore_index=True).fillna('').astype(object)
+    final_df['INPUT_ROW_ID'] = [str(uuid.uuid4()) for _ in range(len(final_df))]
+    flags = final_df.pop('ERROR_FLAGS').to_numpy()
+    final_df['IS_INVALID_CHECK_DIGIT'] = flags != 0
+    final_df['IS_CNTR_DUPLICATE'] = final_df.duplicated(subset=['CNTR NO'], keep=False)
+    final_df['IS_MBL_DUPLICATE'] = final_df.duplicated(subset=['MB/L NO'], keep=False)
+    final_df['CLEAN_CNTR'] = final_df['CNTR NO'].str.replace(r'\s+', '', regex=True)
+    final_df['IS_INVALID_LENGTH'] = final_df['CLEAN_CNTR'].str.len() != 11
+    final_df['IS_ERROR'] = final_df['IS_CNTR_DUPLICATE'] | final_df['IS_MBL_DUPLICATE'] | final_df['IS_INVALID_LENGTH'] | final_df['IS_INVALID_CHECK_DIGIT']
+    display_df = final_df.drop(columns=['INPUT_ROW_ID', 'IS_CNTR_DUPLICATE', 'IS_MBL_DUPLICATE', 'IS_INVALID_LENGTH', 'IS_INVALID_CHECK_DIGIT', 'CLEAN_CNTR', 'IS_ERROR']).copy(deep=True)
+    skipped_df = final_df[final_df['IS_ERROR']].copy()
+    return [final_df, display_df, skipped_df]
+
+def compact_session(frames):
+    final_df = compact_frame(pd.concat(frames, ignore_index=True).fillna(''))
+    skipped_df, _ = validate(final_df, pd.DataFrame())
+    return [final_df, compact_frame(skipped_df)]
+
+def measure(label, build, frames):
+    # memory_usage(deep=True) paylaşılan metin nesnelerini her satırda yeniden sayar; bu yüzden
+    # tutulan bellek tracemalloc ile ölçülür (build dönüşünde hâlâ canlı olan ayırmalar).
+    tracemalloc.start()
+    kept = build(frames)
+    kept_bytes, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<14} oturumda: {kept_bytes / 2**20:9.1f} MB   tepe: {peak / 2**20:9.1f} MB   çerçeve sayısı: {len(kept)}")
+    return kept_bytes
+
+def main():
+    parser = argparse.ArgumentParser(description="Oturumda tutulan sonuç çerçevelerinin bellek ölçümü")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--sheets", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    frames = make_sheet_frames(args.rows, args.sheets, args.seed)
+    print(f"{sum(len(f) for f in frames)} satır, {args.sheets} sayfa (yardımcı sütunlar: {', '.join(HELPER_COLUMNS)})")
+    legacy = measure("eski", legacy_session, frames)
+    compact = measure("sıkıştırılmış", compact_session, frames)
+    print(f"oran: {legacy / compact:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import build_outputs, run_pipeline
+from processing import iso6346_check_digit
+from profiling import PerfRecorder, max_rss_mb
+from readers import CALAMINE_AVAILABLE
+
+# ==========================================
+# SENTETİK DAĞINIK YÜKLEME LİSTESİ ÜRETİCİSİ
+# ==========================================
+# Gerçek taşıyıcı listelerine benzer: başlık üstünde banner satırları, birleştirilmiş (merge)
+# MBL hücreleri, tek hücrede birden fazla konteyner, "40HC/20DC" gibi karışık tip metni,
+# "=>" aktarmalı gemi adları, mükerrer / kısa / kontrol hanesi hatalı konteynerler, boş ayraç
+# satırları ve dosya başına çok sayfa. Aynı (satır, seed) her zaman aynı dosyaları üretir;
+# GENERATOR_VERSION üretici değiştiğinde artırılır ki eski önbellek dosyaları kullanılmasın.
+#
+# Örnek: python benchmarks/bench_pipeline.py --sizes 1000,10000,100000 --output once.json
+#        python benchmarks/bench_pipeline.py --sizes 1000,10000,100000 --output sonra.json --compare once.json
+
+GENERATOR_VERSION = 1
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# (başlık, alan) çiftleri; taşıyıcıya göre sütun adı ve sırası değişir.
+CARRIER_LAYOUTS = [
+    [('MB/L NO', 'mbl'), ('CNTR NO', 'cntr'), ('VOL', 'vol'), ('V/V', 'vv'), ('POL', 'pol'), ('POD', 'pod'), ('BOOKING NO', 'booking')],
+    [('SIRA', 'seq'), ('MASTER B/L', 'mbl'), ('CONTAINER', 'cntr'), ('SIZE/TYPE VOL', 'vol'), ('VESSEL V/V', 'vv'), ('POL', 'pol'), ('POD', 'pod')],
+    [('MB/L NO', 'mbl'), ('BOOKING NO', 'booking'), ('CONTAINER NO', 'cntr'), ('VOL', 'vol'), ('POL', 'pol'), ('POD', 'pod'), ('V/V', 'vv'), ('NOTLAR', 'note')],
+]
+CARRIERS = [('MEDU', 'MSC'), ('MAEU', 'MAERSK'), ('CMDU', 'CMA CGM'), ('HLCU', 'HAPAG-LLOYD')]
+VOLUMES = ['40HC', '40HC', '40 HQ', '20DC', '20DC', '20GP', "40'", "45'", '40DC', '40HC/20DC', "20' DV"]
+VESSELS = ['MSC ANNA 123W', 'MAERSK KOLKATA 245E', 'CMA CGM TAGE 0FL3W', 'EVER GIVEN 1102N']
+TRANSFERS = ['MSC ANNA => MSC LENA', 'MAERSK KOLKATA => MAERSK KIEL', 'CMA CGM TAGE => CMA CGM LISA']
+PORTS = ['ISTANBUL', 'MERSIN', 'IZMIT', 'AMBARLI', 'HAMBURG', 'ROTTERDAM', 'ANTWERP', 'SHANGHAI']
+NOTES = ['', '', '', 'GÜMRÜK BEKLİYOR', 'ACİL', 'HASARLI MÜHÜR']
+
+def make_container(rnd, check_ok=True):
+    number = ''.join(rnd.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(3)) + 'U' + str(rnd.randint(0, 999999)).zfill(6)
+    digit = iso6346_check_digit(number + '0')
+    return number + str(digit if check_ok else (digit + 1) % 10)
+
+def write_messy_sheet(workbook, sheet_name, rows, rnd, containers_seen):
+    # rows kadar veri satırı yazar (banner/başlık hariç). containers_seen mükerrer üretimi için havuzdur.
+    sheet = workbook.add_worksheet(sheet_name)
+    layout = rnd.choice(CARRIER_LAYOUTS)
+    prefix, carrier = rnd.choice(CARRIERS)
+    columns = {field: idx for idx, (_, field) in enumerate(layout)}
+    sheet.write_row(0, 0, [f"{carrier} LINE - LOADING LIST"])
+    sheet.write_row(1, 0, [f"VOYAGE {rnd.randint(100, 999)}W", None, f"TARİH: 2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"])
+    row = 2 + rnd.randint(0, 3)  # değişken sayıda boş banner satırı
+    sheet.write_row(row, 0, [header for header, _ in layout])
+    row += 1
+    written = 0
+    seq = 0
+    while written < rows:
+        if rnd.random() < 0.005:
+            row += 1  # boş ayraç satırı
+            written += 1
+            continue
+        mbl = f"{prefix}{rnd.randint(10**8, 10**9 - 1)}"
+        booking = f"BKG{rnd.randint(10**6, 10**7 - 1)}"
+        vessel = rnd.choice(TRANSFERS) if rnd.random() < 0.15 else rnd.choice(VESSELS)
+        pol, pod = rnd.choice(PORTS), rnd.choice(PORTS)
+        # Çoğu konşimento tek satır (konteynerler aynı hücrede); bir kısmı alt alta satırlara yayılır.
+        count = min(1 if rnd.random() < 0.9 else rnd.choice([2, 2, 3, 4]), rows - written)
+        merge_mbl = count > 1 and rnd.random() < 0.4
+        if merge_mbl:
+            sheet.merge_range(row, columns['mbl'], row + count - 1, columns['mbl'], mbl)
+        for i in range(count):
+            draw = rnd.random()
+            if draw < 0.01 and containers_seen:
+                cntr = rnd.choice(containers_seen)
+            elif draw < 0.02:
+                cntr = make_container(rnd, check_ok=False)
+            elif draw < 0.025:
+                cntr = make_container(rnd)[:-2]
+            elif draw < 0.035:
+                cntr = 'TBA'
+            elif draw < 0.185:
+                extra = rnd.choice([1, 1, 2])
+                cntr = rnd.choice([' / ', ', ', ' & ']).join(make_container(rnd) for _ in range(extra + 1))
+            else:
+                cntr = make_container(rnd)
+            if len(containers_seen) < 10_000:
+                containers_seen.append(cntr)
+            seq += 1
+            values = {'seq': seq, 'mbl': None if merge_mbl else mbl, 'cntr': cntr, 'vol': rnd.choice(VOLUMES), 'vv': vessel,
+                      'pol': pol, 'pod': pod, 'booking': booking, 'note': rnd.choice(NOTES)}
+            for field, col in columns.items():
+                if values[field] is not None and not (merge_mbl and field == 'mbl'):
+                    sheet.write(row, col, values[field])
+            row += 1
+        written += count
+    sheet.write_row(row + 1, 0, [f"TOPLAM: {seq} KONTEYNER"])
+
+def generate_manifests(rows, data_dir, seed=42, sheets=10, rows_per_file=100_000):
+    # rows veri satırını rows_per_file'lık dosyalara, her dosyayı sheets sayfaya böler. Yolları döner.
+    os.makedirs(data_dir, exist_ok=True)
+    file_count = max(1, -(-rows // rows_per_file))
+    paths = []
+    for file_idx in range(file_count):
+        path = os.path.join(data_dir, f"manifest_v{GENERATOR_VERSION}_{rows}_{seed}_{sheets}_{file_idx:03d}.xlsx")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+        rnd = random.Random(f"{seed}-{rows}-{file_idx}")
+        file_rows = min(rows_per_file, rows - file_idx * rows_per_file)
+        per_sheet = np.array_split(np.arange(file_rows), min(sheets, file_rows))
+        containers_seen = []
+        partial = path + ".tmp"
+        workbook = xlsxwriter.Workbook(partial)
+        for sheet_idx, part in enumerate(per_sheet):
+            write_messy_sheet(workbook, f"LISTE {sheet_idx + 1}", len(part), rnd, containers_seen)
+        workbook.close()
+        os.replace(partial, path)
+    return paths
+
+# ==========================================
+# ÖLÇÜM
+# ==========================================
+# Her boyut ayrı (spawn) süreçte ölçülür: ru_maxrss süreç ömrü boyunca düşmediği için önceki
+# boyutların tepe belleği sonrakileri kirletmez. Ölçülen yol: okuma -> find_and_set_header ->
+# process_smart_rows -> birleştirme/doğrulama -> Excel ve Tmaxx çıktıları (build_outputs).
+
+def measure_once(paths, workers=1, trace_memory=False):
+    files = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            files.append((os.path.basename(path), f.read()))
+    baseline = max_rss_mb()
+    perf = PerfRecorder(trace_memory=trace_memory)
+    start = time.perf_counter()
+    result = run_pipeline(files, max_workers=workers, perf=perf)
+    if result.final_df is not None:
+        build_outputs(result)
+    seconds = time.perf_counter() - start
+    perf.close()
+    return {
+        'seconds': seconds,
+        'baseline_rss_mb': baseline,
+        'peak_rss_mb': max_rss_mb(),
+        'worker_peak_rss_mb': max_rss_mb(children=True) if workers > 1 else None,
+        'stats': result.stats,
+        'errors': result.errors,
+        'stages': perf.summary().replace({np.nan: None}).to_dict(orient='records'),
+    }
+
+def run_isolated(func, *args):
+    # Linux'ta ru_maxrss fork/exec ile ebeveynden devralınır; bu yüzden hem üretim hem ölçüm
+    # ebeveyni şişirmeyen ayrı birer spawn sürecinde çalışır. ProcessPoolExecutor işçileri daemon
+    # değildir; --workers > 1 iken ölçüm süreci kendi havuzunu açabilir.
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(func, *args).result()
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'calamine': CALAMINE_AVAILABLE,
+    }
+
+# ==========================================
+# KARŞILAŞTIRMA
+# ==========================================
+
+def compare_runs(baseline, current, threshold):
+    # Aynı satır sayısındaki ölçümleri karşılaştırır; eşikten kötü olanları döner.
+    regressions = []
+    previous = {entry['rows']: entry for entry in baseline['results'] if 'error' not in entry}
+    print(f"\nKarşılaştırma (temel: {baseline['environment'].get('commit')} {baseline['environment'].get('timestamp')})")
+    for entry in current['results']:
+        old = previous.get(entry['rows'])
+        if old is None or 'error' in entry:
+            continue
+        speed = entry['rows_per_second'] / old['rows_per_second']
+        marks = []
+        if speed < 1 - threshold:
+            marks.append("YAVAŞLADI")
+        # Süreç belleği ölçülemeyen platformlarda (peak_rss_mb None) sadece hız karşılaştırılır.
+        memory_text = ""
+        if entry['peak_rss_mb'] is not None and old['peak_rss_mb'] is not None:
+            memory = entry['peak_rss_mb'] / old['peak_rss_mb']
+            if memory > 1 + threshold:
+                marks.append("BELLEK ARTTI")
+            memory_text = f"  tepe {old['peak_rss_mb']:8.1f} -> {entry['peak_rss_mb']:8.1f} MB ({memory:5.2f}x)"
+        print(f"{entry['rows']:>10,} satır  hız {old['rows_per_second']:>10,.0f} -> {entry['rows_per_second']:>10,.0f} satır/sn ({speed:5.2f}x)"
+              f"{memory_text}  {' '.join(marks)}")
+        if marks:
+            regressions.append((entry['rows'], marks))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Uçtan uca işlem hattı benchmark'ı (sentetik dağınık yükleme listeleri)")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Virgülle ayrılmış satır sayıları")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sheets", type=int, default=10, help="Dosya başına sayfa sayısı")
+    parser.add_argument("--rows-per-file", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1, help="Boyut başına tekrar; en hızlı ölçüm raporlanır")
+    parser.add_argument("--trace-memory", action="store_true", help="Aşama tepe belleğini tracemalloc ile de ölç (süreleri şişirir)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "lojistik_bench"), help="Üretilen çalışma kitaplarının önbellek klasörü")
+    parser.add_argument("--output", help="Sonuçları bu JSON dosyasına yaz")
+    parser.add_argument("--compare", help="Önceki bir --output JSON'u; eşikten kötü sonuçta çıkış kodu 1")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Karşılaştırmada izin verilen oran (0.10 = %%10)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    run = {'environment': environment_info(),
+           'config': {'seed': args.seed, 'sheets': args.sheets, 'rows_per_file': args.rows_per_file, 'workers': args.workers, 'repeat': args.repeat,
+                      'trace_memory': args.trace_memory, 'generator_version': GENERATOR_VERSION},
+           'results': []}
+    for rows in sizes:
+        start = time.perf_counter()
+        paths = run_isolated(generate_manifests, rows, args.data_dir, args.seed, args.sheets, args.rows_per_file)
+        print(f"{rows:>10,} satır: {len(paths)} dosya hazır ({time.perf_counter() - start:.1f} sn)", file=sys.stderr)
+        try:
+            # Tekrarlar arasında en hızlısı tutulur (zamanlama gürültüsü tek yönlüdür).
+            outcome = min((run_isolated(measure_once, paths, args.workers, args.trace_memory) for _ in range(args.repeat)),
+                          key=lambda o: o['seconds'])
+        except Exception as e:
+            outcome = {'error': str(e)}
+        entry = {'rows': rows, 'files': len(paths), **outcome}
+        if 'error' in outcome:
+            print(f"{rows:>10,} satır  HATA: {outcome['error']}")
+        else:
+            entry['rows_per_second'] = rows / outcome['seconds']
+            memory_text = (f"  tepe {outcome['peak_rss_mb']:8.1f} MB (başlangıç {outcome['baseline_rss_mb']:.1f} MB)"
+                           if outcome['peak_rss_mb'] is not None else "")
+            print(f"{rows:>10,} satır  {outcome['seconds']:9.2f} sn  {entry['rows_per_second']:>10,.0f} satır/sn"
+                  f"{memory_text}  çıktı {outcome['stats'].get('final', 0):,} konteyner")
+        run['results'].append(entry)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, ensure_ascii=False, indent=2, default=str)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare_runs(baseline, run, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
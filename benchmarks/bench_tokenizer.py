@@ -0,0 +1,89 @@
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing import tokenize_row, tokenize_rows
+
+# ==========================================
+# ESKİ (SATIR BAZLI) ÇIKARICILAR - REFERANS
+# ==========================================
+# Tokenizer'dan önceki extract_container_from_full_row / extract_volume_from_full_row mantığı,
+# satır metnini hazır alacak şekilde.
+
+def legacy_extract_containers(row_str):
+    row_str = row_str.replace('/', ' ').replace(',', ' ').replace('&', ' ').replace(';', ' ').replace('-', ' ').replace(':', ' ')
+    matches = re.findall(r'\b[A-Z]{4}\s*\d{5,8}\b', row_str)
+    valid_containers = []
+    for m in matches:
+        clean_m = m.replace(" ", "").replace("\t", "")
+        if 9 <= len(clean_m) <= 12:
+            valid_containers.append(clean_m)
+    return valid_containers
+
+def legacy_extract_volume(row_str):
+    types = set()
+    if re.search(r'40\s*(HC|HQ|H/C)', row_str): types.add("40HC")
+    if re.search(r'45\s*(HC|HQ|FT|\'|")', row_str): types.add("45HC")
+    if re.search(r'20\s*(DC|GP|DV|ST|FT|\'|")', row_str): types.add("20DC")
+    if re.search(r'40\s*(DC|GP|DV|ST)', row_str): types.add("40DC")
+    elif re.search(r'40\s*(\'|")', row_str) and "40HC" not in types: types.add("40DC")
+    if len(types) > 1: return "⚠️ ŞÜPHELİ (KARIŞIK TİP)"
+    elif len(types) == 1: return list(types)[0]
+    else: return ""
+
+# ==========================================
+# SENTETİK KORPUS
+# ==========================================
+
+def random_container(rnd):
+    owner = ''.join(rnd.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(3)) + 'U'
+    return owner + str(rnd.randint(0, 9999999)).zfill(7)
+
+def make_corpus(rows, seed=42):
+    rnd = random.Random(seed)
+    volumes = ['40HC', '40 HQ', '20DC', '20GP', "40'", "45'", '40DC', '40HC/20DC', '']
+    corpus = []
+    for i in range(rows):
+        containers = [random_container(rnd) for _ in range(rnd.choice([1, 1, 1, 2, 3]))]
+        sep = rnd.choice([' ', '/', ', ', ' & ', '-'])
+        if rnd.random() < 0.05:
+            containers[0] = containers[0][:-2]
+        cells = [f"MBL{i:08d}", sep.join(containers), rnd.choice(volumes), rnd.choice(['MSC ANNA => MSC LENA', 'MAERSK 123W', 'NAN']), 'ISTANBUL', 'HAMBURG']
+        corpus.append(" ".join(cells).upper())
+    return corpus
+
+def timed(label, func, rows):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:8.3f} sn  {rows / elapsed:12,.0f} satır/sn")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Konteyner/tip tokenizer mikro benchmark'ı")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.rows, args.seed)
+    series = pd.Series(corpus)
+    print(f"Korpus: {args.rows:,} satır")
+
+    legacy = timed("eski (satır bazlı, 2 fonksiyon)", lambda: [(legacy_extract_containers(s), legacy_extract_volume(s)) for s in corpus], args.rows)
+    scalar = timed("tokenize_row (skaler)", lambda: [tokenize_row(s) for s in corpus], args.rows)
+    containers, check_ok, volumes = timed("tokenize_rows (vektörel)", lambda: tokenize_rows(series), args.rows)
+
+    container_diff = sum(old[0] != new[0] for old, new in zip(legacy, scalar))
+    volume_diff = sum(old[1] != new[1] for old, new in zip(legacy, scalar))
+    print(f"Fark (eski vs skaler): konteyner {container_diff}, tip {volume_diff}")
+    print(f"Kontrol hanesi hatalı: {(~check_ok & (containers.str.len() == 11)).sum():,} / {len(containers):,}")
+
+if __name__ == "__main__":
+    main()
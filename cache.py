@@ -0,0 +1,117 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# ==========================================
+# İÇERİK HASH'İ İLE SONUÇ ÖNBELLEĞİ
+# ==========================================
+# Anahtarlar dosya içeriğinin hash'inden türetilir; aynı dosya farklı bir yükleme nesnesiyle
+# tekrar bırakılsa da sonuç yeniden kullanılır. Boyut sınırı aşılınca en uzun süredir
+# kullanılmayan (LRU) kayıtlar atılır. directory verilirse kayıtlar diske pickle olarak yazılır.
+
+def content_hash(file_bytes, salt=""):
+    return hashlib.sha256(salt.encode("utf-8") + file_bytes).hexdigest()
+
+def estimate_size(value):
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value) + 64
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    return 64
+
+class ResultCache:
+    def __init__(self, max_bytes=512 * 1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()  # anahtar -> (boyut, değer veya None [diskte])
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".pkl")
+
+    def _load_index(self):
+        # Diskteki kayıtları erişim (mtime) sırasına göre LRU listesine alır.
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, file_key, size in sorted(files):
+            self._entries[file_key] = (size, None)
+            self._size += size
+        self._evict()
+
+    def _disk_key(self, key):
+        return os.path.basename(self._path(key))[:-4]
+
+    def get(self, key):
+        with self._lock:
+            entry_key = self._disk_key(key) if self.directory else key
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            if not self.directory:
+                return entry[1]
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+                os.utime(path)
+                return value
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self._remove(entry_key)
+                return None
+
+    def put(self, key, value):
+        with self._lock:
+            entry_key = self._disk_key(key) if self.directory else key
+            if entry_key in self._entries:
+                self._remove(entry_key)
+            if self.directory:
+                path = self._path(key)
+                with open(path, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = os.path.getsize(path)
+                self._entries[entry_key] = (size, None)
+            else:
+                size = estimate_size(value)
+                self._entries[entry_key] = (size, value)
+            self._size += size
+            self._evict()
+
+    def _remove(self, entry_key):
+        size, _ = self._entries.pop(entry_key)
+        self._size -= size
+        if self.directory:
+            try:
+                os.remove(os.path.join(self.directory, entry_key + ".pkl"))
+            except OSError:
+                pass
+
+    def _evict(self):
+        # Tek başına sınırı aşan son kayıt da atılır; önbellek asla max_bytes'ı geçmez.
+        while self._entries and self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            for entry_key in list(self._entries):
+                self._remove(entry_key)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,162 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from cache import ResultCache
+from history import HistoryIndex
+from pipeline import record_history, run_pipeline, write_outputs
+from processing import default_worker_count, header_layout_key
+from profiling import PROFILE_MODES, PerfRecorder, profile_call
+from streaming import DEFAULT_CHUNK_SIZE, run_streaming
+
+# ==========================================
+# KOMUT SATIRI / TOPLU İŞLEM
+# ==========================================
+# Örnek: python cli.py gelen/ "arsiv/**/*.xlsx" -o cikti/ --workers 4
+#        python cli.py dev_liste.xlsx -o cikti/ --stream --chunk-size 50000
+#        python cli.py gelen/ -o cikti/ --perf-json cikti/perf.json --trace-memory --profile cprofile
+#        python cli.py gelen/ -o cikti/ --header-layouts sablonlar.json
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+def collect_input_files(inputs):
+    # Klasör, glob deseni veya dosya yolu kabul eder; yola göre sıralı ve tekrarsız (yol, ad) listesi döner.
+    # Ad, girdinin kökündeki (klasör veya desenin joker içermeyen başı) göreli yoldur; farklı alt
+    # klasörlerdeki aynı adlı dosyalar KAYNAK_DOSYA'da ayrışır.
+    named = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            root, candidates = item, [os.path.join(item, name) for name in os.listdir(item)]
+        elif glob.has_magic(item):
+            root = item
+            while glob.has_magic(root):
+                root = os.path.dirname(root)
+            candidates = glob.glob(item, recursive=True)
+        else:
+            root, candidates = os.path.dirname(item), [item]
+        for path in candidates:
+            if path.lower().endswith(EXCEL_EXTENSIONS) and os.path.isfile(path):
+                named.setdefault(path, os.path.relpath(path, root or "."))
+    return sorted(named.items())
+
+def load_header_layouts(path):
+    # JSON: {"taşıyıcı": ["MASTER B/L", "UNIT", ...]} veya bir taşıyıcının birden fazla şablonu için
+    # {"taşıyıcı": [[...], [...]]}. Dönüş: {başlık_şablon_anahtarı: taşıyıcı} (bkz. header_layout_key).
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    layouts = {}
+    for carrier, cells in config.items():
+        for layout in (cells if cells and isinstance(cells[0], list) else [cells]):
+            layouts[header_layout_key(layout)] = carrier
+    return layouts
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Lojistik Operasyon Asistanı - toplu işlem")
+    parser.add_argument("inputs", nargs="+", help="Excel dosyaları, klasörler veya glob desenleri")
+    parser.add_argument("-o", "--output", required=True, help="Çıktı klasörü")
+    parser.add_argument("-w", "--workers", type=int, default=1, help=f"Paralel işlemci sayısı (1 = sıralı, bu makinede {default_worker_count()} çekirdek)")
+    parser.add_argument("--cache-dir", help="Disk önbelleği klasörü (tekrar çalıştırmalarda değişmeyen sayfalar atlanır)")
+    parser.add_argument("--cache-max-mb", type=int, default=2048)
+    parser.add_argument("--plain", choices=["csv", "parquet"], help="Ek olarak renksiz birleşik liste yaz")
+    parser.add_argument("--zip", action="store_true", help="Tmaxx CSV'lerini tek ZIP olarak yaz")
+    parser.add_argument("--history", help="Konteyner/MBL geçmişi SQLite dosyası (daha önce yüklenen numaralar işaretlenir)")
+    parser.add_argument("--record", action="store_true", help="Bu çalıştırmanın numaralarını geçmişe kaydet")
+    parser.add_argument("--retention-days", type=int, default=90, help="Geçmiş saklama süresi (gün); daha eski kayıtlar yok sayılır ve silinir")
+    parser.add_argument("--stream", action="store_true", help="Akış modu: satırlar parça parça işlenir, bellek kullanımı parça boyutuyla sınırlı kalır (sıralı çalışır, önbellek kullanılmaz)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Akış modunda parça başına satır sayısı")
+    parser.add_argument("--header-layouts", help="Bilinen taşıyıcı başlık şablonları JSON dosyası ({\"taşıyıcı\": [başlık hücreleri]}); eşleşen satır puanlamasız başlık seçilir")
+    parser.add_argument("--perf-json", help="Aşama bazında süre/satır/bellek ölçümlerini bu JSON dosyasına yaz")
+    parser.add_argument("--trace-memory", action="store_true", help="Aşama başına tepe belleği tracemalloc ile ölç (yavaşlatır)")
+    parser.add_argument("--profile", choices=PROFILE_MODES, help="Çalıştırmayı profil altında yap; rapor çıktı klasörüne PROFIL_<mod>.txt olarak yazılır (sadece ana süreç)")
+    return parser
+
+def print_perf_summary(perf):
+    summary = perf.summary()
+    if summary.empty:
+        return
+    print("Aşama süreleri:")
+    for row in summary.itertuples(index=False):
+        peak = f"  tepe {row.peak_mb:.1f} MB" if row.peak_mb == row.peak_mb else ""
+        print(f"  {row.stage:<20} {row.seconds:9.3f} sn  {int(row.rows or 0):>10} satır{peak}")
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    inputs = collect_input_files(args.inputs)
+    if not inputs:
+        print("Girdi dosyası bulunamadı.", file=sys.stderr)
+        return 2
+
+    files = []
+    for path, name in inputs:
+        with open(path, 'rb') as f:
+            files.append((name, f.read()))
+    cache = ResultCache(max_bytes=args.cache_max_mb * 1024 * 1024, directory=args.cache_dir) if args.cache_dir else None
+    if args.record and not args.history:
+        print("--record için --history gerekli.", file=sys.stderr)
+        return 2
+    history = HistoryIndex(args.history, retention_days=args.retention_days) if args.history else None
+    header_layouts = load_header_layouts(args.header_layouts) if args.header_layouts else None
+
+    def report_progress(done, total, file_name, file_done, file_total):
+        print(f"[{done}/{total}] {file_name} ({file_done}/{file_total})", file=sys.stderr)
+
+    if args.stream and args.plain == "parquet":
+        print("Akış modunda --plain sadece csv olabilir.", file=sys.stderr)
+        return 2
+
+    perf = PerfRecorder(trace_memory=args.trace_memory)
+
+    def run():
+        if args.stream:
+            return run_streaming(files, args.output, chunk_size=args.chunk_size, history=history, record=args.record,
+                                 plain_format=args.plain, zip_tmaxx=args.zip, on_progress=report_progress,
+                                 header_layouts=header_layouts, perf=perf)
+        result = run_pipeline(files, max_workers=max(1, args.workers), on_progress=report_progress, cache=cache,
+                              header_layouts=header_layouts, history=history, perf=perf)
+        if not result.stats:
+            return result, []
+        return result, write_outputs(result, args.output, plain_format=args.plain, zip_tmaxx=args.zip)
+
+    start = time.perf_counter()
+    try:
+        if args.profile:
+            (result, written), profile_report = profile_call(args.profile, run)
+        else:
+            result, written = run()
+    finally:
+        perf.close()
+    for file_name, error in result.errors:
+        print(f"Hata ({file_name}): {error}", file=sys.stderr)
+    if args.profile:
+        os.makedirs(args.output, exist_ok=True)
+        profile_path = os.path.join(args.output, f"PROFIL_{args.profile}.txt")
+        with open(profile_path, 'w', encoding='utf-8') as f:
+            f.write(profile_report)
+        written.append(profile_path)
+    if not result.stats:
+        print("Dosyalar okunamadı veya veri bulunamadı.", file=sys.stderr)
+        return 1
+
+    stats = result.stats
+    print(f"{len(inputs)} dosya, {time.perf_counter() - start:.1f} sn")
+    print(f"Toplam konteyner: {stats['final']}  Mükerrer/uzunluk/kontrol hanesi hatası: {stats['duplicates_and_errors']}  Toplam hatalı veri: {stats['skipped']}")
+    if history is not None:
+        print(f"Daha önce yüklenmiş numara içeren satır: {stats['history_matches']}")
+        if args.record:
+            added = stats['history_recorded'] if args.stream else record_history(result, history)
+            print(f"Geçmişe eklenen yeni numara: {added}")
+    if args.perf_json or args.trace_memory or args.profile:
+        print_perf_summary(perf)
+    if args.perf_json:
+        with open(args.perf_json, 'w', encoding='utf-8') as f:
+            f.write(perf.to_json(stats=stats, parse_timings=result.parse_timings))
+        written.append(args.perf_json)
+    for path in written:
+        print(f"  -> {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import importlib.util
+import io
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from processing import (ERROR_FLAG_CODES, FLAG_CNTR_DUPLICATE, FLAG_CNTR_SEEN, FLAG_INVALID_CHECK_DIGIT, FLAG_INVALID_LENGTH,
+                        FLAG_MBL_DUPLICATE, FLAG_MBL_SEEN)
+
+# ==========================================
+# EXCEL / CSV / PARQUET ÇIKTILARI
+# ==========================================
+# Satır renkleri önce vektörel olarak bir stil dizisine (0: yok, 1: kırmızı, 2: turuncu)
+# çevrilir; Excel'e sadece renkli satırlar için set_row çağrısı yapılır. Çok büyük çıktılarda
+# xlsxwriter constant_memory modu ile satırlar diske akıtılır.
+
+STYLE_NONE, STYLE_RED, STYLE_ORANGE = 0, 1, 2
+RED_FORMAT = {'bg_color': '#FFC7CE', 'font_color': '#9C0006'}
+ORANGE_FORMAT = {'bg_color': '#FCE4D6', 'font_color': '#C65911'}
+# pandas'ın to_excel başlık stili; constant_memory yolunda da aynı görünüm için.
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+CONSTANT_MEMORY_THRESHOLD = 100_000
+
+PARQUET_AVAILABLE = any(importlib.util.find_spec(m) is not None for m in ("pyarrow", "fastparquet"))
+
+def merged_row_styles(final_df):
+    # Kırmızı (uzunluk / kontrol hanesi) turuncuya (mükerrer) göre önceliklidir.
+    flags = final_df['ERROR_FLAGS'].to_numpy()
+    red = (flags & (FLAG_INVALID_LENGTH | FLAG_INVALID_CHECK_DIGIT)) != 0
+    orange = (flags & (FLAG_CNTR_DUPLICATE | FLAG_MBL_DUPLICATE | FLAG_CNTR_SEEN | FLAG_MBL_SEEN)) != 0
+    return np.select([red, orange], [STYLE_RED, STYLE_ORANGE], STYLE_NONE)
+
+def skipped_row_styles(skipped_df):
+    if 'HATA_NEDENI' not in skipped_df.columns:
+        return np.zeros(len(skipped_df), dtype=np.int64)
+    reasons = skipped_df['HATA_NEDENI'].astype(str)
+    red = reasons.str.contains("EKSİK VEYA FAZLA", regex=False) | reasons.str.contains("KONTROL HANESİ", regex=False)
+    orange = reasons.str.contains("TEKRAR", regex=False) | reasons.str.contains("DAHA ÖNCE", regex=False)
+    return np.select([red.to_numpy(dtype=bool), orange.to_numpy(dtype=bool)], [STYLE_RED, STYLE_ORANGE], STYLE_NONE)
+
+def _write_with_pandas(buffer, df, sheet_name, row_styles):
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+        workbook = writer.book
+        worksheet = writer.sheets[sheet_name]
+        formats = {STYLE_RED: workbook.add_format(RED_FORMAT), STYLE_ORANGE: workbook.add_format(ORANGE_FORMAT)}
+        for style, row_format in formats.items():
+            for row_num in np.flatnonzero(row_styles == style):
+                worksheet.set_row(int(row_num) + 1, None, row_format)
+
+class StreamingExcelWriter:
+    # constant_memory: satırlar sırayla yazılıp diske boşaltılır. Renk set_row ile değil hücre formatıyla
+    # verilir; xlsxwriter set_row bilgisini satır başına bellekte tutar, bu da bellek sınırını bozar.
+    # Sütunlar baştan sabittir; append edilen parçalar bu sütunlara göre hizalanır (eksikler boş).
+    def __init__(self, target, sheet_name, columns):
+        self.columns = list(columns)
+        self.rows_written = 0
+        self._workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+        self._worksheet = self._workbook.add_worksheet(sheet_name)
+        self._formats = {STYLE_RED: self._workbook.add_format(RED_FORMAT), STYLE_ORANGE: self._workbook.add_format(ORANGE_FORMAT)}
+        self._worksheet.write_row(0, 0, [str(c) for c in self.columns], self._workbook.add_format(HEADER_FORMAT))
+
+    def append(self, df, row_styles):
+        if list(df.columns) != self.columns:
+            df = df.reindex(columns=self.columns)
+        values = df.astype(object).where(df.notna(), None)
+        start = self.rows_written + 1
+        for row_num, (style, row) in enumerate(zip(np.asarray(row_styles), values.itertuples(index=False, name=None)), start=start):
+            self._worksheet.write_row(row_num, 0, row, self._formats.get(style))
+        self.rows_written += len(df)
+
+    def close(self):
+        self._workbook.close()
+
+def _write_constant_memory(buffer, df, sheet_name, row_styles):
+    writer = StreamingExcelWriter(buffer, sheet_name, df.columns)
+    writer.append(df, row_styles)
+    writer.close()
+
+def write_styled_excel(df, sheet_name, row_styles, constant_memory=None):
+    if constant_memory is None:
+        constant_memory = len(df) > CONSTANT_MEMORY_THRESHOLD
+    buffer = io.BytesIO()
+    if constant_memory:
+        _write_constant_memory(buffer, df, sheet_name, np.asarray(row_styles))
+    else:
+        _write_with_pandas(buffer, df, sheet_name, np.asarray(row_styles))
+    buffer.seek(0)
+    return buffer
+
+def to_csv_bytes(df):
+    # Renksiz, başlıklı düz CSV (Excel'in Türkçe karakterleri tanıması için BOM'lu).
+    return df.to_csv(index=False).encode('utf-8-sig')
+
+def to_parquet_bytes(df):
+    if not PARQUET_AVAILABLE:
+        raise ImportError("Parquet çıktısı için pyarrow veya fastparquet kurulu olmalı.")
+    buffer = io.BytesIO()
+    # Karışık tipli sütunlar (ör. TEU: 1, 2 veya '') metne çevrilir.
+    df.astype({c: str for c in df.columns if df[c].dtype == object}).to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+# ==========================================
+# TMAXX CSV ÇIKTILARI
+# ==========================================
+# Sayfa başına noktalı virgüllü, başlıksız CSV. Hata eki ERROR_FLAGS bit kodundan hazır
+# tabloyla seçilir; tüm sayfalar tek groupby geçişinde yazılır.
+
+TMAXX_ERROR_FLAGS = [
+    (FLAG_CNTR_DUPLICATE, "CNTR TEKRAR"),
+    (FLAG_MBL_DUPLICATE, "MBL TEKRAR"),
+    (FLAG_INVALID_LENGTH, "UZUNLUK HATASI"),
+    (FLAG_INVALID_CHECK_DIGIT, "KONTROL HANESİ HATASI"),
+    (FLAG_CNTR_SEEN, "CNTR DAHA ÖNCE YÜKLENDİ"),
+    (FLAG_MBL_SEEN, "MBL DAHA ÖNCE YÜKLENDİ"),
+]
+TMAXX_SUFFIXES = np.array([
+    f" [HATA: {' + '.join(label for flag, label in TMAXX_ERROR_FLAGS if code & flag)}]" if code else ""
+    for code in range(ERROR_FLAG_CODES)
+], dtype=object)
+
+def tmaxx_error_suffixes(final_df):
+    if 'ERROR_FLAGS' not in final_df.columns:
+        return TMAXX_SUFFIXES[np.zeros(len(final_df), dtype=np.int64)]
+    return TMAXX_SUFFIXES[final_df['ERROR_FLAGS'].to_numpy()]
+
+def iter_tmaxx_csvs(final_df):
+    # (dosya_adı, csv_bytes) üretir. Aynı adlı sayfalar (farklı dosyalardan) tek CSV'de birleşir.
+    if 'KAYNAK_SAYFA' not in final_df.columns:
+        return
+    tmaxx_df = pd.DataFrame({
+        'Container No': final_df['CNTR NO'].astype(str).to_numpy(dtype=object) + tmaxx_error_suffixes(final_df),
+        'Container Type': final_df['VOL'] if 'VOL' in final_df.columns else "",
+        'KAYNAK_SAYFA': final_df['KAYNAK_SAYFA'],
+    }, index=final_df.index)
+    tmaxx_df = tmaxx_df[tmaxx_df['Container No'] != '']
+    for sheet_name, sheet_df in tmaxx_df.groupby('KAYNAK_SAYFA', sort=False, observed=True):
+        safe_name = str(sheet_name).replace("/", "_").replace("\\", "_")
+        csv_text = sheet_df[['Container No', 'Container Type']].to_csv(index=False, header=False, sep=';')
+        yield f"{safe_name}.csv", csv_text.encode('utf-8')
+
+def build_tmaxx_files(final_df):
+    return dict(iter_tmaxx_csvs(final_df))
+
+def build_tmaxx_zip(tmaxx_files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for file_name, file_bytes in tmaxx_files.items():
+            zf.writestr(file_name, file_bytes)
+    return buffer.getvalue()
+
+class TmaxxCsvAppender:
+    # Akış modu: her parçanın sayfa CSV'leri directory altındaki dosyalara eklenir (ilk görülme sırasıyla).
+    def __init__(self, directory):
+        self.directory = directory
+        self.file_names = []
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, final_df):
+        for file_name, csv_bytes in iter_tmaxx_csvs(final_df):
+            if file_name not in self.file_names:
+                self.file_names.append(file_name)
+                mode = 'wb'
+            else:
+                mode = 'ab'
+            with open(os.path.join(self.directory, file_name), mode) as f:
+                f.write(csv_bytes)
+
+    def paths(self):
+        return [os.path.join(self.directory, name) for name in self.file_names]
+
+    def write_zip(self, zip_path):
+        with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            for file_name in self.file_names:
+                zf.write(os.path.join(self.directory, file_name), file_name)
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# ==========================================
+# KALICI KONTEYNER / MBL GEÇMİŞİ
+# ==========================================
+# Daha önce yüklenen konteyner ve MBL numaraları SQLite'ta (kind, key) birincil anahtarıyla
+# tutulur; her anahtar için ilk görüldüğü dosya, sayfa, dosya içerik hash'i ve tarih saklanır.
+# Toplu sorgu: anahtarlar geçici tabloya yazılıp tek JOIN ile eşlenir, satır satır sorgu yapılmaz.
+# retention_days verilirse daha eski kayıtlar eşleşmede yok sayılır ve prune() ile silinir.
+
+KIND_CNTR, KIND_MBL = "CNTR", "MBL"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_keys (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    sheet_name TEXT NOT NULL,
+    file_hash TEXT NOT NULL,
+    seen_at TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS seen_keys_seen_at ON seen_keys (seen_at);
+"""
+
+class HistoryIndex:
+    def __init__(self, path, retention_days=None):
+        self.path = path
+        self.retention_days = retention_days
+        # Streamlit oturumları ayrı iş parçacıklarında çalışır; yazmalar tek kilitle sıralanır.
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _cutoff(self, older_than_days=None):
+        days = older_than_days if older_than_days is not None else self.retention_days
+        if days is None:
+            return None
+        return (datetime.now() - timedelta(days=days)).strftime(TIMESTAMP_FORMAT)
+
+    def lookup(self, kind, keys):
+        # Geçmişte bulunan anahtarları döner: key, file_name, sheet_name, file_hash, seen_at.
+        columns = ['key', 'file_name', 'sheet_name', 'file_hash', 'seen_at']
+        keys = [k for k in dict.fromkeys(keys) if k]
+        if not keys:
+            return pd.DataFrame(columns=columns)
+        cutoff = self._cutoff()
+        conn = self._connect()
+        try:
+            conn.execute("CREATE TEMP TABLE batch_keys (key TEXT PRIMARY KEY) WITHOUT ROWID")
+            conn.executemany("INSERT OR IGNORE INTO batch_keys VALUES (?)", ((k,) for k in keys))
+            query = ("SELECT s.key, s.file_name, s.sheet_name, s.file_hash, s.seen_at "
+                     "FROM batch_keys b JOIN seen_keys s ON s.kind = ? AND s.key = b.key")
+            params = [kind]
+            if cutoff is not None:
+                query += " WHERE s.seen_at >= ?"
+                params.append(cutoff)
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        return pd.DataFrame(rows, columns=columns)
+
+    def record(self, kind, rows, seen_at=None):
+        # rows: (key, file_name, sheet_name, file_hash) demetleri. Var olan anahtarın ilk kaydı korunur;
+        # saklama süresi dolmuş kayıt ise yenisiyle değiştirilir (yoksa sonraki prune() onu silerdi).
+        seen_at = seen_at or datetime.now().strftime(TIMESTAMP_FORMAT)
+        cutoff = self._cutoff()
+        if cutoff is None:
+            query, extra = "INSERT OR IGNORE INTO seen_keys VALUES (?, ?, ?, ?, ?, ?)", ()
+        else:
+            query = ("INSERT INTO seen_keys VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (kind, key) DO UPDATE SET "
+                     "file_name = excluded.file_name, sheet_name = excluded.sheet_name, "
+                     "file_hash = excluded.file_hash, seen_at = excluded.seen_at WHERE seen_keys.seen_at < ?")
+            extra = (cutoff,)
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    before = conn.total_changes
+                    conn.executemany(
+                        query,
+                        ((kind, key, file_name, sheet_name, file_hash, seen_at) + extra for key, file_name, sheet_name, file_hash in rows if key))
+                    return conn.total_changes - before
+            finally:
+                conn.close()
+
+    def prune(self, older_than_days=None):
+        # Saklama süresinden eski kayıtları siler; silinen kayıt sayısını döner.
+        cutoff = self._cutoff(older_than_days)
+        if cutoff is None:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    return conn.execute("DELETE FROM seen_keys WHERE seen_at < ?", (cutoff,)).rowcount
+            finally:
+                conn.close()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM seen_keys")
+            finally:
+                conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute("SELECT kind, COUNT(*) FROM seen_keys GROUP BY kind").fetchall())
+            oldest, newest = conn.execute("SELECT MIN(seen_at), MAX(seen_at) FROM seen_keys").fetchone()
+        finally:
+            conn.close()
+        return {'containers': counts.get(KIND_CNTR, 0), 'mbls': counts.get(KIND_MBL, 0), 'oldest': oldest, 'newest': newest}
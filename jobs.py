@@ -0,0 +1,237 @@
+import itertools
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+
+from pipeline import build_outputs, run_pipeline
+from profiling import PerfRecorder, profile_call
+
+# ==========================================
+# ARKA PLAN ANALİZ İŞLERİ
+# ==========================================
+# Analizler Streamlit betiğinin dışında, her iş için ayrı bir iş parçacığında çalışır; betik
+# sadece durumu okur. Sayfa yeniden çalışsa veya sekme kapansa da iş sürer, sonuç iş kimliğiyle
+# geri alınır. Sınırlar:
+#   - aynı anda en fazla max_running iş çalışır,
+#   - her sahip (operatör oturumu) en fazla max_per_owner aktif (bekleyen + çalışan) işe sahip olabilir,
+#   - bekleyen iş sayısı max_pending ile sınırlıdır (yüklenen dosyalar iş başlayana kadar bellekte).
+# Sahibinin vazgeçtiği (abandon) çalışan iş sahip sınırına sayılmaz, bitince sonucu atılır; çalışma
+# sınırına (max_running) ise bitene kadar sayılmaya devam eder.
+# Boşalan yer, o an en az çalışan işi olan sahibe, eşitlikte en uzun süredir iş başlatılmamış
+# sahibe (round-robin) verilir; böylece bir operatörün işleri diğerlerini bekletmez. İş içi paralellik ingest_files'ın süreç havuzuyla (max_workers) yapılır.
+# tracemalloc süreç geneli olduğundan eşzamanlı işlerde aşama tepe bellek değerleri birbirini etkiler.
+# İşler her zaman run_pipeline ile bellekte çalışır: arayüzün tablo, grafik ve sayfalı listesi final_df
+# ister; akış modu (run_streaming) sonucu sadece dosyalara yazar ve CLI'ın --stream seçeneğiyle kullanılır.
+
+JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_CANCELLED = "bekliyor", "çalışıyor", "tamamlandı", "hata", "iptal"
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+# Python 3.12+ aynı anda tek profil aracına izin verir; profil istenen işler sırayla profillenir.
+_PROFILE_LOCK = threading.Lock()
+
+class JobLimitError(RuntimeError):
+    pass
+
+@dataclass
+class Job:
+    id: str
+    owner: str
+    files: list
+    options: dict
+    seq: int
+    status: str = JOB_QUEUED
+    stage: str = ""
+    done: int = 0
+    total: int = 0
+    # dosya adı -> (tamamlanan, toplam) sayfa; sayfa listesi bilinmeyen dosya tek birimdir (bkz. ingest_files)
+    file_progress: dict = field(default_factory=dict)
+    file_names: list = field(default_factory=list)
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    result: object = None
+    artifacts: dict = None
+    profile_report: str = None
+    error: str = None
+    abandoned: bool = False  # sahibi sonucu istemiyor; bitince kayıttan silinir
+
+class JobStore:
+    # Bellek içi iş kaydı; erişim JobManager kilidi altında yapılır. Aynı arayüzle yerel bir
+    # kuyruk veya veritabanı ile değiştirilebilir.
+    def __init__(self):
+        self._jobs = {}
+
+    def add(self, job):
+        self._jobs[job.id] = job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def remove(self, job_id):
+        return self._jobs.pop(job_id, None)
+
+    def values(self):
+        return list(self._jobs.values())
+
+def collect_artifacts(outputs):
+    # build_outputs sonucunu oturumda saklanabilir bytes sözlüğüne çevirir.
+    return {
+        'excel': outputs['excel'].getvalue(),
+        'skipped_excel': outputs['skipped_excel'].getvalue() if outputs['skipped_excel'] is not None else None,
+        'tmaxx_files': outputs['tmaxx_files'],
+        'tmaxx_zip': outputs['tmaxx_zip'],
+    }
+
+class JobManager:
+    def __init__(self, max_running=2, max_per_owner=1, max_pending=10, finished_ttl=3600, store=None):
+        self.max_running = max_running
+        self.max_per_owner = max_per_owner
+        self.max_pending = max_pending
+        self.finished_ttl = finished_ttl  # alınmayan bitmiş işler bu süre (sn) sonra silinir
+        self._store = store or JobStore()
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._starts = itertools.count()
+        self._last_start = {}  # sahip -> son iş başlatma sırası
+
+    def submit(self, owner, files, **options):
+        # options: run_pipeline argümanları (max_workers, cache, header_layouts, history) ile
+        # trace_memory ve profile_mode. Sınır aşılırsa JobLimitError.
+        with self._lock:
+            self._expire()
+            active = [job for job in self._store.values() if job.status in ACTIVE_STATES]
+            if sum(job.owner == owner and not job.abandoned for job in active) >= self.max_per_owner:
+                raise JobLimitError(f"Aynı anda en fazla {self.max_per_owner} analiz başlatabilirsiniz; önceki işin bitmesini bekleyin.")
+            if sum(job.status == JOB_QUEUED for job in active) >= self.max_pending:
+                raise JobLimitError("Analiz kuyruğu dolu; lütfen biraz sonra tekrar deneyin.")
+            job = Job(id=uuid.uuid4().hex[:12], owner=owner, files=files, options=options, seq=next(self._seq),
+                      file_names=[file_name for file_name, _ in files])
+            self._store.add(job)
+            self._dispatch()
+            return job.id
+
+    def _queue_order(self):
+        # Kilit altında çağrılır. Bekleyen işleri _dispatch'in başlatacağı sırayla döner: çalışan
+        # işler bitmeden her boş yer sırayla doldurulsaydı. Sıra durumunda da aynı anahtar kullanılır.
+        per_owner = Counter(job.owner for job in self._store.values() if job.status == JOB_RUNNING)
+        last_start = dict(self._last_start)
+        queued = [job for job in self._store.values() if job.status == JOB_QUEUED]
+        starts = itertools.count(max(last_start.values(), default=-1) + 1)
+        order = []
+        while queued:
+            job = min(queued, key=lambda j: (per_owner[j.owner], last_start.get(j.owner, -1), j.seq))
+            queued.remove(job)
+            order.append(job)
+            per_owner[job.owner] += 1
+            last_start[job.owner] = next(starts)
+        return order
+
+    def _dispatch(self):
+        # Kilit altında çağrılır.
+        running = sum(job.status == JOB_RUNNING for job in self._store.values())
+        for job in self._queue_order()[:max(0, self.max_running - running)]:
+            self._last_start[job.owner] = next(self._starts)
+            job.status, job.stage, job.started_at = JOB_RUNNING, "okuma", time.time()
+            threading.Thread(target=self._run, args=(job,), name=f"analiz-{job.id}", daemon=True).start()
+
+    def _run(self, job):
+        options = dict(job.options)
+        trace_memory = options.pop('trace_memory', False)
+        profile_mode = options.pop('profile_mode', None)
+        perf = PerfRecorder(trace_memory=trace_memory)
+
+        def on_progress(done, total, file_name, file_done, file_total):
+            with self._lock:
+                job.done, job.total = done, total
+                job.file_progress[file_name] = (file_done, file_total)
+
+        def work():
+            result = run_pipeline(job.files, on_progress=on_progress, perf=perf, **options)
+            artifacts = None
+            if result.final_df is not None:
+                job.stage = "çıktılar"
+                artifacts = collect_artifacts(build_outputs(result))
+            return result, artifacts
+
+        try:
+            if profile_mode:
+                # cProfile/pyinstrument çağıran iş parçacığını profiller; diğer işler rapora girmez.
+                with _PROFILE_LOCK:
+                    (result, artifacts), job.profile_report = profile_call(profile_mode, work)
+            else:
+                result, artifacts = work()
+            status, error = JOB_DONE, None
+        except Exception as e:
+            result, artifacts, status, error = None, None, JOB_FAILED, str(e)
+        finally:
+            perf.close()
+        with self._lock:
+            job.status, job.stage, job.finished_at = status, "", time.time()
+            job.files = None  # yüklenen dosyalar artık gerekmiyor
+            if job.abandoned:
+                self._store.remove(job.id)
+            else:
+                job.result, job.artifacts, job.error = result, artifacts, error
+            self._dispatch()
+
+    def status(self, job_id):
+        # Arayüz için tutarlı kopya; iş yoksa (alınmış/süresi dolmuş) None.
+        with self._lock:
+            self._expire()
+            job = self._store.get(job_id)
+            if job is None:
+                return None
+            return {
+                'id': job.id, 'status': job.status, 'stage': job.stage, 'done': job.done, 'total': job.total,
+                # (dosya adı, tamamlanan, toplam); toplam 0 ise henüz bilinmiyor
+                'files': [(file_name, *job.file_progress.get(file_name, (0, 0))) for file_name in job.file_names],
+                'queue_position': self._queue_order().index(job) + 1 if job.status == JOB_QUEUED else 0,
+                'elapsed': (job.finished_at or time.time()) - (job.started_at or job.submitted_at),
+                'error': job.error,
+            }
+
+    def collect(self, job_id):
+        # Bitmiş işi kayıttan çıkarıp döner (sonuç, çıktılar ve profil raporu ile); bitmemişse None.
+        with self._lock:
+            job = self._store.get(job_id)
+            if job is None or job.status in ACTIVE_STATES:
+                return None
+            return self._store.remove(job_id)
+
+    def cancel(self, job_id):
+        # Sadece kuyruktaki iş iptal edilebilir; çalışan iş süreç havuzu ortasında kesilmez.
+        with self._lock:
+            job = self._store.get(job_id)
+            if job is None or job.status != JOB_QUEUED:
+                return False
+            job.status, job.finished_at, job.files = JOB_CANCELLED, time.time(), None
+            return True
+
+    def abandon(self, job_id):
+        # Sahibi artık sonucu beklemiyor (ör. yeni dosya yükledi). Kuyruktaki iş hemen silinir; çalışan
+        # iş sahip sınırından düşer ve bitince sonucu saklanmadan kayıttan çıkar.
+        with self._lock:
+            job = self._store.get(job_id)
+            if job is None:
+                return False
+            if job.status == JOB_RUNNING:
+                job.abandoned = True
+            else:
+                self._store.remove(job_id)
+            return True
+
+    def overview(self):
+        with self._lock:
+            self._expire()
+            counts = Counter(job.status for job in self._store.values())
+        return {'running': counts[JOB_RUNNING], 'queued': counts[JOB_QUEUED], 'max_running': self.max_running}
+
+    def _expire(self):
+        # Kilit altında çağrılır.
+        cutoff = time.time() - self.finished_ttl
+        for job in self._store.values():
+            if job.status not in ACTIVE_STATES and job.finished_at < cutoff:
+                self._store.remove(job.id)
+        owners = {job.owner for job in self._store.values()}
+        self._last_start = {owner: start for owner, start in self._last_start.items() if owner in owners}
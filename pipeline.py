@@ -0,0 +1,284 @@
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from export import (build_tmaxx_files, build_tmaxx_zip, merged_row_styles, skipped_row_styles,
+                    to_csv_bytes, to_parquet_bytes, write_styled_excel)
+from history import KIND_CNTR, KIND_MBL
+from processing import (ERROR_FLAG_CODES, FLAG_CNTR_DUPLICATE, FLAG_CNTR_SEEN, FLAG_INVALID_CHECK_DIGIT, FLAG_INVALID_LENGTH,
+                        FLAG_MBL_DUPLICATE, FLAG_MBL_SEEN, SUSPICIOUS_VOLUME, ingest_files)
+from profiling import NULL_RECORDER, PerfRecorder
+
+# ==========================================
+# İŞLEM HATTI: OKUMA -> DOĞRULAMA -> ÇIKTILAR
+# ==========================================
+# Streamlit arayüzü ve komut satırı (cli.py) aynı hattı kullanır.
+
+HELPER_COLUMNS = ['INPUT_ROW_ID', 'ERROR_FLAGS', 'KAYNAK_HASH']
+# Az sayıda farklı değer alan sütunlar kategorik tutulur (satır başına tekrar eden metin yerine kod).
+CATEGORY_COLUMNS = ['KAYNAK_DOSYA', 'KAYNAK_SAYFA', 'KAYNAK_HASH', 'VOL', 'V/V', 'POL', 'POD']
+# Gerekçe metnindeki sıra; tablo ERROR_FLAGS koduyla indekslenir.
+ERROR_REASONS = [
+    (FLAG_INVALID_LENGTH, "KONTEYNER NO EKSİK VEYA FAZLA"),
+    (FLAG_INVALID_CHECK_DIGIT, "KONTEYNER NO KONTROL HANESİ HATALI"),
+    (FLAG_CNTR_DUPLICATE, "TEKRAR EDEN KONTEYNER"),
+    (FLAG_MBL_DUPLICATE, "GİRDİDE TEKRAR EDEN MBL"),
+    (FLAG_CNTR_SEEN, "DAHA ÖNCE YÜKLENMİŞ KONTEYNER"),
+    (FLAG_MBL_SEEN, "DAHA ÖNCE YÜKLENMİŞ MBL"),
+]
+ERROR_REASON_TABLE = np.array([
+    " + ".join(reason for flag, reason in ERROR_REASONS if code & flag)
+    for code in range(ERROR_FLAG_CODES)
+], dtype=object)
+# (geçmiş türü, sütun, bayrak, açıklama etiketi)
+HISTORY_CHECKS = [
+    (KIND_CNTR, 'CNTR NO', FLAG_CNTR_SEEN, "CNTR"),
+    (KIND_MBL, 'MB/L NO', FLAG_MBL_SEEN, "MBL"),
+]
+HISTORY_MATCH_COLUMNS = ['TÜR', 'NUMARA', 'İLK DOSYA', 'İLK SAYFA', 'İLK YÜKLEME']
+
+MERGED_EXCEL_NAME = "BIRLESTIRILMIS_LISTE.xlsx"
+SKIPPED_EXCEL_NAME = "HATALI_KAYITLAR.xlsx"
+TMAXX_ZIP_NAME = "TMAXX_LISTELERI.zip"
+
+@dataclass
+class PipelineResult:
+    final_df: pd.DataFrame = None
+    skipped_df: pd.DataFrame = None
+    stats: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+    parse_timings: list = field(default_factory=list)
+    history_matches: pd.DataFrame = None
+    # Aşama ölçümleri (profiling.PerfRecorder); sonradan hazırlanan çıktılar da buraya eklenir.
+    perf: PerfRecorder = None
+    # İşlem sonunda bir kez hesaplanan özetler (compute_aggregates); arayüz tam çerçeveyi taramaz.
+    aggregates: dict = field(default_factory=dict)
+
+def error_reasons(error_rows):
+    return ERROR_REASON_TABLE[error_rows['ERROR_FLAGS'].to_numpy()]
+
+def compact_frame(df):
+    # Yerinde dönüştürür: kategorik metin sütunları ve en küçük uygun tamsayı satır kimliği.
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if 'INPUT_ROW_ID' in df.columns and pd.api.types.is_integer_dtype(df['INPUT_ROW_ID']):
+        df['INPUT_ROW_ID'] = pd.to_numeric(df['INPUT_ROW_ID'], downcast='unsigned')
+    return df
+
+def check_history(final_df, history):
+    # Geçmişte görülen konteyner/MBL'ler için ERROR_FLAGS'e *_SEEN bitlerini ekler. Anahtarlar tek
+    # toplu sorguyla eşlenir; aynı içerikli dosyanın kendi kayıtları (yeniden analiz) sayılmaz.
+    # Dönüş: (satır başına önceki yükleme açıklaması, eşleşen numaraların özeti)
+    row_hashes = final_df['KAYNAK_HASH'].astype(object).to_numpy(dtype=object)
+    flags = final_df['ERROR_FLAGS'].to_numpy(dtype=np.uint8, copy=True)
+    seen_info = np.full(len(final_df), '', dtype=object)
+    summaries = []
+    for kind, col, flag, label in HISTORY_CHECKS:
+        keys = final_df[col].astype(str).to_numpy(dtype=object)
+        matches = history.lookup(kind, pd.unique(keys))
+        if matches.empty:
+            continue
+        matches = matches.set_index('key')
+        pos = matches.index.get_indexer(keys)
+        hit = pos >= 0
+        hit[hit] = matches['file_hash'].to_numpy(dtype=object)[pos[hit]] != row_hashes[hit]
+        if not hit.any():
+            continue
+        flags[hit] |= flag
+        desc = (f"{label}: " + matches['file_name'] + " / " + matches['sheet_name'] + " (" + matches['seen_at'] + ")").to_numpy(dtype=object)
+        separator = np.where(seen_info[hit] == '', '', '; ').astype(object)
+        seen_info[hit] = seen_info[hit] + separator + desc[pos[hit]]
+        summary = matches.loc[pd.unique(keys[hit]), ['file_name', 'sheet_name', 'seen_at']].reset_index()
+        summary.insert(0, 'kind', label)
+        summary.columns = HISTORY_MATCH_COLUMNS
+        summaries.append(summary)
+    final_df['ERROR_FLAGS'] = flags
+    history_matches = pd.concat(summaries, ignore_index=True) if summaries else pd.DataFrame(columns=HISTORY_MATCH_COLUMNS)
+    return seen_info, history_matches
+
+def record_frame_history(final_df, history):
+    # Çerçevedeki konteyner ve MBL numaralarını geçmişe yazar; yeni anahtar sayısını döner.
+    file_names = final_df['KAYNAK_DOSYA'].astype(object).to_numpy(dtype=object)
+    sheet_names = final_df['KAYNAK_SAYFA'].astype(object).to_numpy(dtype=object)
+    row_hashes = final_df['KAYNAK_HASH'].astype(object).to_numpy(dtype=object)
+    added = 0
+    for kind, col, _, _ in HISTORY_CHECKS:
+        added += history.record(kind, zip(final_df[col].astype(str), file_names, sheet_names, row_hashes))
+    return added
+
+def record_history(result, history):
+    # Saklama süresini uygular ve sonucu geçmişe yazar. Önce prune: süresi dolmuş anahtar yeniden
+    # yüklendiyse yeni kaydı silinmez.
+    with (result.perf or NULL_RECORDER).stage("geçmiş kaydı", rows=len(result.final_df)):
+        history.prune()
+        added = record_frame_history(result.final_df, history)
+    return added
+
+def invalid_length_mask(df):
+    return (df['CNTR NO'].astype(str).str.replace(r'\s+', '', regex=True).str.len() != 11).to_numpy()
+
+def error_rows_frame(df, seen_info=None):
+    # ERROR_FLAGS'i sıfır olmayan satırlar, HATA_NEDENI (ve varsa ONCEKI_YUKLEME) ile.
+    has_error = df['ERROR_FLAGS'].to_numpy() != 0
+    error_rows = df[has_error].copy()
+    if not error_rows.empty:
+        error_rows['HATA_NEDENI'] = error_reasons(error_rows)
+        if seen_info is not None:
+            error_rows['ONCEKI_YUKLEME'] = seen_info[has_error]
+    return error_rows
+
+def validate(final_df, final_skipped_df, seen_info=None):
+    # final_df'in ERROR_FLAGS sütununa hata bitlerini ekler; hatalı satırlar gerekçeleriyle atlananlara eklenir.
+    # seen_info (check_history) verilirse hatalı satırlara ONCEKI_YUKLEME açıklaması eklenir.
+    flags = final_df['ERROR_FLAGS'].to_numpy(dtype=np.uint8, copy=True)
+    flags[final_df.duplicated(subset=['CNTR NO'], keep=False).to_numpy()] |= FLAG_CNTR_DUPLICATE
+    mbl_row_counts = final_df.groupby('MB/L NO')['INPUT_ROW_ID'].nunique()
+    duplicate_mbls = mbl_row_counts[mbl_row_counts > 1].index
+    flags[final_df['MB/L NO'].isin(duplicate_mbls).to_numpy()] |= FLAG_MBL_DUPLICATE
+    flags[invalid_length_mask(final_df)] |= FLAG_INVALID_LENGTH
+    final_df['ERROR_FLAGS'] = flags
+    if "VOL" not in final_df.columns: final_df["VOL"] = ""
+
+    error_rows = error_rows_frame(final_df, seen_info)
+    if not error_rows.empty:
+        # Atlanan satırlarda olmayan kategorik sütunlar (ör. KAYNAK_HASH) birleştirmede kategorik kalır ve
+        # fillna('') yeni kategori eklemeyi reddeder; metne çevrilir.
+        error_rows = error_rows.astype({col: object for col in error_rows.select_dtypes('category').columns})
+        final_skipped_df = pd.concat([final_skipped_df, error_rows], ignore_index=True).fillna('')
+    return final_skipped_df, len(error_rows)
+
+def run_pipeline(files, max_workers=1, on_progress=None, cache=None, header_layouts=None, history=None, perf=None):
+    # files: [(dosya_adı, bytes), ...]. Veri bulunamazsa final_df None döner.
+    # history (HistoryIndex) verilirse satırlar geçmişe karşı kontrol edilir; kayıt record_history ile ayrıca yapılır.
+    # perf verilmezse süre/satır ölçümü yine yapılır (tracemalloc kapalı).
+    perf = perf if perf is not None else PerfRecorder()
+    all_dfs, all_skipped_dfs, errors, parse_timings = ingest_files(
+        files, max_workers=max_workers, on_progress=on_progress, cache=cache, header_layouts=header_layouts, perf=perf)
+    result = PipelineResult(errors=errors, parse_timings=parse_timings, perf=perf)
+    if not all_dfs:
+        return result
+
+    with perf.stage("birleştirme", rows=sum(len(df) for df in all_dfs)):
+        final_df = compact_frame(pd.concat(all_dfs, ignore_index=True).fillna(''))
+        final_skipped_df = pd.concat(all_skipped_dfs, ignore_index=True).fillna('') if all_skipped_dfs else pd.DataFrame()
+        del all_dfs, all_skipped_dfs
+    seen_info = None
+    if history is not None:
+        with perf.stage("geçmiş kontrolü", rows=len(final_df)):
+            seen_info, result.history_matches = check_history(final_df, history)
+    with perf.stage("mükerrer kontrolü", rows=len(final_df)):
+        final_skipped_df, error_count = validate(final_df, final_skipped_df, seen_info)
+
+    result.final_df = final_df
+    result.skipped_df = compact_frame(final_skipped_df)
+    result.stats = {
+        'skipped': len(final_skipped_df),
+        'duplicates_and_errors': error_count,
+        'final': len(final_df),
+        'history_matches': int(((final_df['ERROR_FLAGS'].to_numpy() & (FLAG_CNTR_SEEN | FLAG_MBL_SEEN)) != 0).sum()),
+    }
+    result.aggregates = compute_aggregates(final_df)
+    return result
+
+# ==========================================
+# GÖRÜNTÜLEME: ÖZETLER, ARAMA VE SAYFALAMA
+# ==========================================
+
+def compute_aggregates(final_df):
+    # Tip dağılımı (sıfır olmayanlar), şüpheli tip sayısı ve hata türü başına satır sayısı.
+    volume_counts = final_df['VOL'].value_counts()
+    volume_counts = volume_counts[volume_counts > 0]
+    code_counts = np.bincount(final_df['ERROR_FLAGS'].to_numpy(), minlength=ERROR_FLAG_CODES)
+    codes = np.arange(ERROR_FLAG_CODES)
+    return {
+        'volume_counts': {str(label): int(count) for label, count in volume_counts.items()},
+        'suspicious': int(volume_counts.get(SUSPICIOUS_VOLUME, 0)),
+        'error_counts': {reason: int(code_counts[(codes & flag) != 0].sum()) for flag, reason in ERROR_REASONS},
+    }
+
+def filter_rows(final_df, query="", errors_only=False):
+    # CNTR/MBL içinde geçen sorguya (boşluksuz, büyük harf) ve isteğe bağlı hata bayrağına göre
+    # eşleşen satırların konumlarını döner. Arayüz sonucu sorgu değişene kadar saklar.
+    mask = np.ones(len(final_df), dtype=bool)
+    if errors_only:
+        mask &= final_df['ERROR_FLAGS'].to_numpy() != 0
+    query = query.upper().replace(" ", "")
+    if query:
+        mask &= (final_df['CNTR NO'].str.contains(query, regex=False)
+                 | final_df['MB/L NO'].str.contains(query, regex=False)).to_numpy()
+    return np.flatnonzero(mask)
+
+def page_rows(result, positions, page, page_size):
+    # Sadece istenen sayfanın satırları kopyalanır (page 1'den başlar); indeks satır konumudur.
+    start = (page - 1) * page_size
+    return result.final_df.iloc[positions[start:start + page_size]][display_columns(result)]
+
+def display_columns(result):
+    return [c for c in result.final_df.columns if c not in HELPER_COLUMNS]
+
+def display_frame(result):
+    # Kopya tutulmaz; ihtiyaç anında türetilir (pandas Copy-on-Write ile sütunlar paylaşılır).
+    return result.final_df[display_columns(result)]
+
+def build_merged_excel(result, constant_memory=None):
+    return write_styled_excel(display_frame(result), 'Sheet1', merged_row_styles(result.final_df), constant_memory)
+
+def build_skipped_excel(result, constant_memory=None):
+    if result.skipped_df is None or result.skipped_df.empty:
+        return None
+    df_skipped_export = result.skipped_df.drop(columns=HELPER_COLUMNS, errors='ignore')
+    return write_styled_excel(df_skipped_export, 'Hatalar', skipped_row_styles(df_skipped_export), constant_memory)
+
+def build_outputs(result, constant_memory=None):
+    perf = result.perf or NULL_RECORDER
+    rows = len(result.final_df)
+    with perf.stage("excel: birleşik", rows=rows):
+        excel = build_merged_excel(result, constant_memory)
+    with perf.stage("excel: hatalar", rows=0 if result.skipped_df is None else len(result.skipped_df)):
+        skipped_excel = build_skipped_excel(result, constant_memory)
+    with perf.stage("tmaxx csv", rows=rows):
+        tmaxx_files = build_tmaxx_files(result.final_df)
+        tmaxx_zip = build_tmaxx_zip(tmaxx_files) if tmaxx_files else None
+    return {
+        'excel': excel,
+        'skipped_excel': skipped_excel,
+        'tmaxx_files': tmaxx_files,
+        'tmaxx_zip': tmaxx_zip,
+    }
+
+def build_plain_export(result, plain_format):
+    # Renksiz CSV / Parquet çıktısı (bytes).
+    perf = result.perf or NULL_RECORDER
+    with perf.stage(plain_format, rows=len(result.final_df)):
+        if plain_format == 'parquet':
+            return to_parquet_bytes(display_frame(result))
+        return to_csv_bytes(display_frame(result))
+
+def write_outputs(result, out_dir, plain_format=None, zip_tmaxx=False, constant_memory=None):
+    # Birleşik Excel, hata Excel'i ve Tmaxx CSV'lerini (tmaxx/ altına veya tek ZIP) out_dir'e yazar.
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = build_outputs(result, constant_memory)
+    written = []
+
+    def write(name, data):
+        path = os.path.join(out_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data.getvalue() if hasattr(data, 'getvalue') else data)
+        written.append(path)
+
+    write(MERGED_EXCEL_NAME, outputs['excel'])
+    if outputs['skipped_excel'] is not None:
+        write(SKIPPED_EXCEL_NAME, outputs['skipped_excel'])
+    if zip_tmaxx:
+        if outputs['tmaxx_zip'] is not None:
+            write(TMAXX_ZIP_NAME, outputs['tmaxx_zip'])
+    else:
+        os.makedirs(os.path.join(out_dir, 'tmaxx'), exist_ok=True)
+        for file_name, file_bytes in outputs['tmaxx_files'].items():
+            write(os.path.join('tmaxx', file_name), file_bytes)
+    if plain_format in ('csv', 'parquet'):
+        write(f"BIRLESTIRILMIS_LISTE.{plain_format}", build_plain_export(result, plain_format))
+    return written
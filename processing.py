@@ -0,0 +1,491 @@
+import itertools
+import json
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from cache import content_hash
+from profiling import NULL_RECORDER, PerfRecorder
+from readers import iter_sheets, list_sheet_names
+
+# Çıktıyı etkileyen her ayrıştırma değişikliğinde artırılır; eski önbellek kayıtları geçersiz olur.
+PROCESSING_VERSION = "5"
+
+# ==========================================
+# 1. SATIR AYRIŞTIRMA
+# ==========================================
+
+def make_columns_unique(columns):
+    seen = {}
+    new_columns = []
+    for col in columns:
+        col_str = str(col).strip()
+        if not col_str or col_str.lower() in ['nan', 'none', '']:
+            col_str = "Unknown_Col"
+        if col_str in seen:
+            seen[col_str] += 1
+            new_col = f"{col_str}.{seen[col_str]}"
+        else:
+            seen[col_str] = 0
+            new_col = col_str
+        new_columns.append(new_col)
+    return new_columns
+
+HEADER_SEARCH_ROWS = 30
+HEADER_KEYWORDS = ["MB/L NO", "BOOKING NO", "POL", "POD", "VOL", "V/V", "CONTAINER", "CNTR"]
+# Lookahead ile iç içe geçen anahtar kelimeler de (ör. "V/VOL") ayrı ayrı sayılır.
+HEADER_KEYWORD_PATTERN = re.compile("(?=(" + "|".join(re.escape(k) for k in HEADER_KEYWORDS) + "))")
+
+def header_layout_key(values):
+    # Taşıyıcı şablonunu tanımlayan anahtar: normalize başlık hücreleri, sondaki boşlar atılır.
+    cells = ['' if pd.isna(val) else str(val).strip().upper() for val in values]
+    while cells and cells[-1] == '':
+        cells.pop()
+    return tuple(cells)
+
+def score_header_row(values):
+    row_str = " ".join(str(val).upper() for val in values if not pd.isna(val))
+    return len(set(HEADER_KEYWORD_PATTERN.findall(row_str)))
+
+def detect_header(rows, known_layouts=None):
+    # rows: ilk satırların herhangi bir iterable'ı (DataFrame penceresi veya okuyucunun satır akışı).
+    # known_layouts (çağıranın verdiği şablonlar, bkz. header_layout_key) içindeki bir satır görülürse
+    # puanlamaya gerek kalmadan hemen döner. Şablonlar buradan öğrenilmez; tek anahtar kelimeli bir
+    # kapak sayfası sonraki sayfaların başlığını bozardı.
+    # Dönüş: (başlık_idx, başlık_hücreleri) veya None.
+    header_idx = -1
+    header_values = None
+    max_score = 0
+    for i, values in enumerate(itertools.islice(rows, HEADER_SEARCH_ROWS)):
+        if known_layouts and header_layout_key(values) in known_layouts:
+            return i, list(values)
+        score = score_header_row(values)
+        if score > max_score:
+            max_score = score
+            header_idx = i
+            header_values = list(values)
+    if header_idx == -1:
+        return None
+    return header_idx, header_values
+
+def find_and_set_header(raw_df, known_layouts=None):
+    # Toplu işlemde sayfa okuyucudan tümüyle okunmuş olarak gelir; başlık ilk HEADER_SEARCH_ROWS
+    # satırda aransa da okuma penceresi daraltılmaz. Okuyucudan doğrudan pencere okuma yalnızca akış
+    # modunda (streaming.iter_sheet_chunks) yapılır.
+    header = detect_header(raw_df.iloc[:HEADER_SEARCH_ROWS].to_numpy(dtype=object), known_layouts)
+    if header is None:
+        return None
+    header_idx, header_values = header
+    # Kopya yok: gövde ham çerçevenin dilimidir, sadece sütun adları değişir.
+    df = raw_df.iloc[header_idx + 1:]
+    df.columns = make_columns_unique(header_values)
+    return df
+
+EMPTY_CELL_VALUES = ['NAN', 'NONE', '']
+EMPTY_MBL_VALUES = ['NAN', 'NONE', '', 'NA', 'UNKNOWN_COL']
+SUSPICIOUS_VOLUME = "⚠️ ŞÜPHELİ (KARIŞIK TİP)"
+
+# Tek geçişli satır tokenizer'ı: konteyner numaraları ve tip kodları aynı taramada bulunur.
+# Harfle başlayan token konteyner, rakamla başlayan token tip kodudur. Token'lar karakter
+# tükettiği için konteyner numarasının kendi rakamları (ör. "...540'" sonu) tip kodu sayılmaz;
+# harfe yapışık kodlar da (ör. "...40 DCYU1234567") tip sayılmaz, konteynerin başı olarak kalır.
+# Boyut ile kod arasında tırnak olabilir ("20'DV", "40' HC"); tek başına tırnak da bir koddur ("40'").
+ROW_TOKEN_PATTERN = re.compile(
+    r'\b[A-Z]{4}[\s/,&;\-:]*\d{5,8}\b'
+    r'|(?:[24]0|45)\s*[\'"]?\s*(?:HC|HQ|H/C|FT|DC|GP|DV|ST)(?![A-Z])'
+    r'|(?:[24]0|45)\s*[\'"]'
+)
+CONTAINER_NOISE = re.compile(r'[ \t/,&;\-:]')
+# Tablo araması öncesi boşluklar ve koddan önceki tırnak atılır: "40'HC" -> "40HC" (40DC değil).
+VOLUME_TOKEN_NOISE = re.compile(r'\s+|[\'"](?=\s*[A-Z])')
+
+# Tip kodu token'ı (boşluksuz) -> bit. Kurallar eski regex'lerle aynı.
+VOLUME_BIT_HC40, VOLUME_BIT_HC45, VOLUME_BIT_DC20, VOLUME_BIT_DC40, VOLUME_BIT_Q40 = 1, 2, 4, 8, 16
+VOLUME_TOKEN_BITS = {}
+for _prefix, _suffixes, _bit in [
+    ("40", ["HC", "HQ", "H/C"], VOLUME_BIT_HC40),
+    ("45", ["HC", "HQ", "FT", "'", '"'], VOLUME_BIT_HC45),
+    ("20", ["DC", "GP", "DV", "ST", "FT", "'", '"'], VOLUME_BIT_DC20),
+    ("40", ["DC", "GP", "DV", "ST"], VOLUME_BIT_DC40),
+    ("40", ["'", '"'], VOLUME_BIT_Q40),
+]:
+    for _suffix in _suffixes:
+        VOLUME_TOKEN_BITS[_prefix + _suffix] = _bit
+
+def volume_label(mask):
+    # Eski kural: 40' / 40" sadece 40DC kodu ve 40HC yoksa 40DC sayılır.
+    types = []
+    if mask & VOLUME_BIT_HC40: types.append("40HC")
+    if mask & VOLUME_BIT_HC45: types.append("45HC")
+    if mask & VOLUME_BIT_DC20: types.append("20DC")
+    if mask & VOLUME_BIT_DC40 or (mask & VOLUME_BIT_Q40 and not mask & VOLUME_BIT_HC40): types.append("40DC")
+    if len(types) > 1: return SUSPICIOUS_VOLUME
+    return types[0] if types else ""
+
+VOLUME_LABELS = [volume_label(mask) for mask in range(32)]
+VOLUME_LABEL_ARRAY = np.array(VOLUME_LABELS, dtype=object)
+
+# Satır hataları ayrı bool sütunlar yerine tek uint8 ERROR_FLAGS sütununda bit olarak tutulur.
+# *_SEEN bitleri kalıcı geçmişte (history.py) daha önce görülen anahtarlar içindir.
+FLAG_CNTR_DUPLICATE, FLAG_MBL_DUPLICATE, FLAG_INVALID_LENGTH, FLAG_INVALID_CHECK_DIGIT = 1, 2, 4, 8
+FLAG_CNTR_SEEN, FLAG_MBL_SEEN = 16, 32
+ERROR_FLAG_CODES = 64
+
+# ISO 6346: harf değerleri 10'dan başlar, 11'in katları (11, 22, 33) atlanır.
+ISO6346_LETTER_VALUES = dict(zip("ABCDEFGHIJKLMNOPQRSTUVWXYZ", [v for v in range(10, 39) if v % 11 != 0]))
+ISO6346_CHAR_TABLE = np.full(128, -10_000, dtype=np.int64)
+for _char, _value in ISO6346_LETTER_VALUES.items():
+    ISO6346_CHAR_TABLE[ord(_char)] = _value
+ISO6346_CHAR_TABLE[ord('0'):ord('9') + 1] = np.arange(10)
+ISO6346_WEIGHTS = 2 ** np.arange(10)
+ISO6346_DIGITS = {str(d): d for d in range(10)}
+
+def iso6346_check_digit(cntr):
+    # 11 haneli numaranın beklenen kontrol hanesi; biçim uygun değilse None.
+    if len(cntr) != 11:
+        return None
+    values = [ISO6346_LETTER_VALUES.get(ch) for ch in cntr[:4]] + [ISO6346_DIGITS.get(ch) for ch in cntr[4:10]]
+    if None in values:
+        return None
+    return sum(value << i for i, value in enumerate(values)) % 11 % 10
+
+def iso6346_check_ok(containers):
+    # Vektörel kontrol hanesi doğrulaması; 11 hane olmayanlar False döner (uzunluk hatası ayrıca işaretlenir).
+    values = containers.to_numpy(dtype=str)
+    ok = np.zeros(len(values), dtype=bool)
+    is_11 = np.char.str_len(values) == 11
+    if is_11.any():
+        codes = values[is_11].astype('<U11').view(np.uint32).reshape(-1, 11)
+        char_values = ISO6346_CHAR_TABLE[np.minimum(codes, 127)]
+        expected = (char_values[:, :10] * ISO6346_WEIGHTS).sum(axis=1) % 11 % 10
+        ok[is_11] = (expected == char_values[:, 10]) & (char_values[:, :10] >= 0).all(axis=1)
+    return ok
+
+def tokenize_row(row_str):
+    # Tek satır metni için skaler sürüm: (konteynerler, tip, kontrol hanesi geçerli mi listesi).
+    containers = []
+    mask = 0
+    for token in ROW_TOKEN_PATTERN.findall(row_str):
+        if token[0].isalpha():
+            cntr = CONTAINER_NOISE.sub('', token)
+            if 9 <= len(cntr) <= 12:
+                containers.append(cntr)
+        else:
+            mask |= VOLUME_TOKEN_BITS.get(VOLUME_TOKEN_NOISE.sub('', token), 0)
+    check_ok = [len(c) == 11 and iso6346_check_digit(c) == ISO6346_DIGITS.get(c[-1]) for c in containers]
+    return containers, VOLUME_LABELS[mask], check_ok
+
+def tokenize_rows(row_str):
+    # Vektörel sürüm, satır başına tek findall geçişi. Dönüş: (konteynerler [satır indeksli], kontrol_ok, tipler)
+    volumes = pd.Series("", index=row_str.index, dtype=object)
+    tokens = row_str.str.findall(ROW_TOKEN_PATTERN).explode().dropna()
+    is_container = tokens.str.match(r'[A-Z]').to_numpy(dtype=bool)
+
+    containers = tokens[is_container].str.replace(CONTAINER_NOISE, '', regex=True)
+    containers = containers[containers.str.len().between(9, 12)]
+    check_ok = pd.Series(iso6346_check_ok(containers), index=containers.index)
+
+    volume_tokens = tokens[~is_container]
+    if not volume_tokens.empty:
+        bits = volume_tokens.str.replace(VOLUME_TOKEN_NOISE, '', regex=True).map(VOLUME_TOKEN_BITS).fillna(0).to_numpy(dtype=np.int64)
+        rows = volume_tokens.index.to_numpy()
+        # explode satır sırasını korur: aynı satırın token'ları ardışık, reduceat ile OR'lanır.
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        row_masks = np.bitwise_or.reduceat(bits, starts)
+        volumes.loc[rows[starts]] = VOLUME_LABEL_ARRAY[row_masks]
+    return containers, check_ok, volumes
+
+def find_column(columns, *keywords):
+    return next((c for c in columns if any(k in str(c).upper() for k in keywords)), None)
+
+def build_row_strings(text_df):
+    # Satır başına tek birleştirme: " ".join(str(val).upper() ...) ile aynı metin, sütun sütun.
+    cols = list(text_df.columns)
+    row_str = text_df[cols[0]]
+    for col in cols[1:]:
+        row_str = row_str + " " + text_df[col]
+    return row_str.str.upper()
+
+def extract_vessels_vectorized(text_df, vv_col_name):
+    vessels = pd.Series("", index=text_df.index, dtype=object)
+    if vv_col_name:
+        vv = text_df[vv_col_name].str.strip()
+        vessels = vessels.where(vv.str.upper().isin(EMPTY_CELL_VALUES), vv)
+    # Sondan başa: "=>" içeren ilk hücre kazanır.
+    for col in reversed(text_df.columns):
+        has_transfer = text_df[col].str.contains("=>", regex=False)
+        if has_transfer.any():
+            vessels = vessels.mask(has_transfer, text_df[col].str.strip())
+    return vessels
+
+def process_smart_rows(df, row_id_offset=0):
+    mbl_col_name = find_column(df.columns, "MB/L", "MASTER")
+    vv_col_name = find_column(df.columns, "V/V", "VESSEL")
+    extra_cols = {col: find_column(df.columns, col) for col in ["POL", "POD", "BOOKING NO"]}
+
+    df = df.reset_index(drop=True)
+    text_df = df.apply(lambda s: s.map(str))
+
+    is_empty = text_df.apply(lambda s: s.str.strip().isin(EMPTY_CELL_VALUES)) | df.isna()
+    keep = ~is_empty.all(axis=1)
+    df, text_df = df[keep], text_df[keep]
+    if df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    mbl = pd.Series("", index=df.index, dtype=object)
+    if mbl_col_name:
+        raw_mbl = text_df[mbl_col_name].str.upper().str.strip()
+        mbl = mbl.mask(~raw_mbl.isin(EMPTY_MBL_VALUES), raw_mbl.str.replace(" ", "", regex=False))
+
+    row_str = build_row_strings(text_df)
+    containers, check_ok, volumes = tokenize_rows(row_str)
+    has_mbl = mbl != ""
+    has_containers = df.index.isin(containers.index)
+    ok = has_mbl & has_containers
+
+    processed = pd.DataFrame()
+    if ok.any():
+        ok_idx = ok.index[ok]
+        ctype = volumes[ok_idx]
+        teu = pd.Series("", index=ok_idx, dtype=object)
+        teu[ctype.str.contains("20", regex=False)] = 1
+        teu[ctype.str.contains("40", regex=False) | ctype.str.contains("45", regex=False)] = 2
+        teu[ctype.str.contains("ŞÜPHELİ", regex=False)] = ""
+        row_fields = pd.DataFrame({
+            "MB/L NO": mbl[ok_idx],
+            "VOL": ctype.replace("", "Unknown"),
+            "TEU": teu,
+            "V/V": extract_vessels_vectorized(text_df.loc[ok_idx], vv_col_name),
+        }, index=ok_idx)
+        for col, actual_col in extra_cols.items():
+            if actual_col: row_fields[col] = text_df.loc[ok_idx, actual_col]
+        # Her konteyner eşleşmesi bir çıktı satırı; satır alanları eşleşmenin satırından gelir.
+        in_ok_rows = containers.index.isin(ok_idx)
+        ok_containers = containers[in_ok_rows]
+        processed = row_fields.loc[ok_containers.index].reset_index(drop=True)
+        processed.insert(0, "INPUT_ROW_ID", ok_containers.index + row_id_offset)
+        processed.insert(2, "CNTR NO", ok_containers.to_numpy())
+        # Uzunluğu 11 olup ISO 6346 kontrol hanesi tutmayanlar; uzunluk hatası ayrıca işaretlenir.
+        invalid_check = (ok_containers.str.len() == 11).to_numpy() & ~check_ok[in_ok_rows].to_numpy()
+        processed['ERROR_FLAGS'] = np.where(invalid_check, FLAG_INVALID_CHECK_DIGIT, 0).astype(np.uint8)
+
+    skipped = pd.DataFrame()
+    if not ok.all():
+        bad_idx = ok.index[~ok]
+        skipped = df.loc[bad_idx].copy()
+        bad_mbl = has_mbl[bad_idx]
+        bad_cntr = has_containers[~ok]
+        skipped['HATA_NEDENI'] = "EKSİK KONTEYNER NO"
+        skipped.loc[~bad_mbl, 'HATA_NEDENI'] = "EKSİK MBL NO"
+        skipped.loc[~bad_mbl & ~bad_cntr, 'HATA_NEDENI'] = "MBL VE KONTEYNER NO BULUNAMADI"
+        skipped['BULUNAN_MBL'] = mbl[bad_idx].replace("", "YOK")
+        bad_containers = containers[containers.index.isin(bad_idx)]
+        # groupby().agg(join) satır başına Python çağrısı yapar; düz sözlük birleştirmesi çok daha ucuz.
+        found = {}
+        for idx, cntr in zip(bad_containers.index, bad_containers):
+            found[idx] = found[idx] + ", " + cntr if idx in found else cntr
+        skipped['BULUNAN_CNTR'] = pd.Series(found, dtype=object).reindex(bad_idx).fillna("YOK")
+        skipped = skipped.reset_index(drop=True)
+
+    return processed, skipped
+
+# ==========================================
+# 2. DOSYA / SAYFA İŞLEME VE PARALEL ÇALIŞTIRMA
+# ==========================================
+
+def _describe_sheet(item):
+    return {'sheet': item[0], 'rows': len(item[1])}
+
+def _process_sheet(sheet_name, raw_df, header_layouts, perf):
+    with perf.stage("başlık", sheet=sheet_name, rows=len(raw_df)):
+        df = find_and_set_header(raw_df, header_layouts)
+    if df is None:
+        return sheet_name, pd.DataFrame(), pd.DataFrame(), 0
+    with perf.stage("satır işleme", sheet=sheet_name, rows=len(df)):
+        processed_df, skipped_df = process_smart_rows(df)
+    if not processed_df.empty:
+        processed_df['KAYNAK_SAYFA'] = sheet_name
+    if not skipped_df.empty:
+        skipped_df['KAYNAK_SAYFA'] = sheet_name
+    return sheet_name, processed_df, skipped_df, len(df)
+
+def process_file(file_name, file_bytes, sheet_names=None, timings=None, header_layouts=None, perf=None, errors=None):
+    # sheet_names=None tüm sayfaları işler; liste verilirse sadece o sayfalar okunur.
+    # Başlık bulunamayan sayfalar da boş sonuçla döner ki önbellekte "işlendi" olarak kalsın.
+    # perf (PerfRecorder) verilirse okuma, başlık ve satır işleme aşamaları sayfa bazında ölçülür.
+    # Sonuçlar dosya adı içermez (önbellek içerik hash'iyle çalışır); KAYNAK_DOSYA'yı ingest_files ekler.
+    # errors (liste) verilirse okunamayan/işlenemeyen sayfalar (sayfa_adı, mesaj) olarak eklenir ve
+    # diğer sayfalar işlenmeye devam eder; verilmezse ilk hata yükselir.
+    perf = perf or NULL_RECORDER
+    results = []
+    with perf.labels(file=file_name):
+        sheets = iter_sheets(file_bytes, sheet_names, timings=timings, errors=errors)
+        for sheet_name, raw_df in perf.timed_iter(sheets, "okuma", describe=_describe_sheet):
+            try:
+                results.append(_process_sheet(sheet_name, raw_df, header_layouts, perf))
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors.append((sheet_name, str(e)))
+    return results
+
+def _run_task(file_name, file_bytes, sheet_names, header_layouts=None, measure=False, trace_memory=False):
+    # İşçi süreçte ölçüm kayıtları düz sözlük listesi olarak döner (pickle ile taşınır).
+    # Hatalar (sayfa_adı, mesaj) listesidir; dosya hiç açılamadıysa sayfa_adı None.
+    timings = {}
+    errors = []
+    perf = PerfRecorder(trace_memory=trace_memory, enabled=measure)
+    try:
+        return process_file(file_name, file_bytes, sheet_names, timings, header_layouts, perf, errors), timings, errors, perf.records
+    except Exception as e:
+        return [], timings, [(None, str(e))], perf.records
+    finally:
+        perf.close()
+
+def _merge_parse_timings(task_timings):
+    # Sayfa bazlı işlerin okuma sürelerini dosya bazında toplar (dosya sırasıyla).
+    per_file = {}
+    for (file_idx, _), (file_name, timings) in sorted(task_timings.items()):
+        if not timings:
+            continue
+        entry = per_file.setdefault(file_idx, {'file': file_name, 'engine': timings['engine'], 'seconds': 0.0, 'sheets': {}})
+        entry['seconds'] += timings['total']
+        entry['sheets'].update(timings['sheets'])
+    return list(per_file.values())
+
+def _with_source_file(df, file_name, **columns):
+    # Önbellekteki çerçeve yerinde değiştirilmez (assign kopya döner); aynı içerik farklı adla
+    # yüklendiğinde de güncel dosya adı yazılır.
+    df = df.assign(**columns)
+    df.insert(df.columns.get_loc('KAYNAK_SAYFA'), 'KAYNAK_DOSYA', file_name)
+    return df
+
+def header_layouts_digest(header_layouts):
+    # Şablon anahtarlarının sıradan bağımsız özeti; taşıyıcı adları başlık seçimini etkilemez.
+    if not header_layouts:
+        return ""
+    return content_hash(json.dumps(sorted(header_layouts), ensure_ascii=False).encode("utf-8"))[:16]
+
+def file_cache_key(file_bytes, header_layouts=None):
+    # Başlık şablonları hangi satırın başlık seçileceğini değiştirir; farklı şablonlarla işlenen
+    # aynı dosya ayrı önbellek kaydı kullanır.
+    return content_hash(file_bytes, salt=f"{PROCESSING_VERSION}:{header_layouts_digest(header_layouts)}")
+
+def ingest_files(files, max_workers=1, on_progress=None, cache=None, header_layouts=None, perf=None):
+    # files: [(dosya_adı, bytes), ...]. Sonuçlar her zaman dosya ve sayfa sırasıyla birleştirilir;
+    # paralel modda işlerin bitiş sırası çıktıyı değiştirmez. cache verilirse sadece önbellekte
+    # olmayan sayfalar okunur. header_layouts: {başlık_şablon_anahtarı: taşıyıcı} (bkz. header_layout_key).
+    # perf verilirse işçilerin aşama kayıtları ona eklenir; önbellekten gelen sayfalar "önbellek" aşamasıdır.
+    # on_progress(tamamlanan, toplam, dosya_adı, dosya_tamamlanan, dosya_toplam) sayfa birimiyle çağrılır;
+    # sayfa listesi bilinmeyen dosya (sıralı mod, önbellekte yok) tek birimdir. Önbellekteki sayfalar
+    # baştan tamamlanmış sayılır ve bildirilir. İşlenen satırlar KAYNAK_HASH (kaynak dosyanın içerik
+    # hash'i) taşır; geçmiş kontrolü dosyayı adıyla değil bununla tanır (aynı adlı farklı dosyalar ayrışır).
+    perf = perf or NULL_RECORDER
+    tasks = []  # (file_idx, dosya_adı, bytes, hash, [(sayfa_idx, sayfa_adı)] veya None)
+    results = {}  # (file_idx, sayfa_idx) -> sayfa sonucu
+    file_progress = {}  # file_idx -> [tamamlanan, toplam]
+    task_timings = {}
+    errors = []
+    for file_idx, (file_name, file_bytes) in enumerate(files):
+        file_hash = file_cache_key(file_bytes, header_layouts) if cache is not None else None
+        sheet_names = cache.get(('sheets', file_hash)) if cache is not None else None
+        if sheet_names is None and max_workers > 1:
+            try:
+                sheet_names = list_sheet_names(file_bytes)
+            except Exception as e:
+                errors.append((file_name, str(e)))
+                continue
+            if cache is not None:
+                cache.put(('sheets', file_hash), sheet_names)
+        if sheet_names is None:
+            tasks.append((file_idx, file_name, file_bytes, file_hash, None))
+            file_progress[file_idx] = [0, 1]
+            continue
+        missing = []
+        for sheet_idx, sheet_name in enumerate(sheet_names):
+            cached = cache.get((file_hash, sheet_name)) if cache is not None else None
+            if cached is None:
+                missing.append((sheet_idx, sheet_name))
+            else:
+                results[(file_idx, sheet_idx)] = cached
+                perf.extend([{'stage': "önbellek", 'file': file_name, 'sheet': sheet_name, 'rows': cached[3], 'seconds': 0.0}])
+        file_progress[file_idx] = [len(sheet_names) - len(missing), len(sheet_names)]
+        if not missing:
+            task_timings[(file_idx, -1)] = (file_name, {'engine': 'önbellek', 'total': 0.0, 'sheets': {}})
+        elif max_workers > 1:
+            # Paralel mod: her (dosya, sayfa) ayrı bir iş; tek büyük dosyanın sayfaları da dağıtılır.
+            tasks.extend((file_idx, file_name, file_bytes, file_hash, [sheet]) for sheet in missing)
+        else:
+            tasks.append((file_idx, file_name, file_bytes, file_hash, missing))
+
+    def report(file_idx):
+        if on_progress:
+            file_done, file_total = file_progress[file_idx]
+            on_progress(sum(p[0] for p in file_progress.values()), sum(p[1] for p in file_progress.values()),
+                        files[file_idx][0], file_done, file_total)
+
+    for file_idx, (file_done, file_total) in file_progress.items():
+        if file_done or file_done == file_total:
+            report(file_idx)
+
+    def collect(task, outcome):
+        # Hatalı sayfa sonuç listesinde yoktur; biten sayfalar yine birleştirilir ve önbelleğe alınır.
+        file_idx, file_name, _, file_hash, selection = task
+        sheet_results, timings, task_errors, records = outcome
+        perf.extend(records)
+        if selection is None:
+            positions = range(len(sheet_results))
+        else:
+            sheet_positions = {sheet_name: sheet_idx for sheet_idx, sheet_name in selection}
+            positions = [sheet_positions[sheet_result[0]] for sheet_result in sheet_results]
+        for sheet_idx, sheet_result in zip(positions, sheet_results):
+            results[(file_idx, sheet_idx)] = sheet_result
+            if cache is not None:
+                cache.put((file_hash, sheet_result[0]), sheet_result)
+        if cache is not None and selection is None and not task_errors:
+            cache.put(('sheets', file_hash), [sheet_result[0] for sheet_result in sheet_results])
+        task_timings[(file_idx, selection[0][0] if selection else 0)] = (file_name, timings)
+        for sheet_name, error in task_errors:
+            errors.append((file_name, error if sheet_name is None else f"'{sheet_name}' sayfası: {error}"))
+        file_progress[file_idx][0] += len(selection) if selection is not None else 1
+        report(file_idx)
+
+    def task_sheets(selection):
+        return None if selection is None else [sheet_name for _, sheet_name in selection]
+
+    measure = {'measure': perf.enabled, 'trace_memory': perf.trace_memory}
+
+    if max_workers > 1 and len(tasks) > 1:
+        # spawn: Streamlit sunucusu çok iş parçacıklı, fork edilmesi güvenli değil.
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)), mp_context=ctx) as pool:
+            futures = {pool.submit(_run_task, task[1], task[2], task_sheets(task[4]), header_layouts, **measure): task for task in tasks}
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+    else:
+        for task in tasks:
+            collect(task, _run_task(task[1], task[2], task_sheets(task[4]), header_layouts, **measure))
+
+    all_dfs = []
+    all_skipped_dfs = []
+    row_id_offset = 0
+    source_hashes = {}
+    for key in sorted(results):
+        sheet_name, processed_df, skipped_df, row_count = results[key]
+        file_name, file_bytes = files[key[0]]
+        if not processed_df.empty:
+            if key[0] not in source_hashes:
+                source_hashes[key[0]] = content_hash(file_bytes)
+            all_dfs.append(_with_source_file(processed_df, file_name, INPUT_ROW_ID=processed_df['INPUT_ROW_ID'] + row_id_offset,
+                                             KAYNAK_HASH=source_hashes[key[0]]))
+        if not skipped_df.empty:
+            all_skipped_dfs.append(_with_source_file(skipped_df, file_name))
+        row_id_offset += row_count
+    return all_dfs, all_skipped_dfs, errors, _merge_parse_timings(task_timings)
+
+def default_worker_count():
+    return os.cpu_count() or 1
@@ -0,0 +1,161 @@
+import cProfile
+import importlib.util
+import io
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: süreç tepe belleği ölçülmez
+    resource = None
+
+# ==========================================
+# AŞAMA ÖLÇÜMÜ VE PROFİL
+# ==========================================
+# PerfRecorder her aşama için süre, satır sayısı, dosya/sayfa ve bellek kaydı tutar. Süreç
+# tepe belleği (maxrss) her zaman, aşama içi tepe bellek trace_memory=True ise tracemalloc ile
+# ölçülür (yavaşlatır). Havuz işçileri kendi kayıtlarını döner, ana süreçte extend ile eklenir.
+
+PYINSTRUMENT_AVAILABLE = importlib.util.find_spec("pyinstrument") is not None
+PROFILE_MODES = ["cprofile"] + (["pyinstrument"] if PYINSTRUMENT_AVAILABLE else [])
+RECORD_FIELDS = ['stage', 'file', 'sheet', 'rows', 'seconds', 'peak_mb', 'max_rss_mb']
+NUMERIC_FIELDS = ['rows', 'seconds', 'peak_mb', 'max_rss_mb']
+
+def max_rss_mb(children=False):
+    # Linux'ta KB, macOS'ta bayt; resource modülü yoksa None. children=True: beklenen alt süreçlerin en büyüğü.
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+class PerfRecorder:
+    def __init__(self, trace_memory=False, enabled=True):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.memory_traced = self.trace_memory  # close() sonrası raporda korunur
+        self.records = []
+        self._labels = {}
+        self._peaks = []  # iç içe aşamalar için açık aşamaların tepe değerleri
+        self._started_tracing = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def close(self):
+        # tracemalloc'u durdurur; sonraki aşamalar (ör. sonradan hazırlanan çıktılar) bellek ölçmeden kaydedilir.
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.trace_memory = False
+
+    @contextmanager
+    def labels(self, **labels):
+        # Bu blokta açılan aşamalara varsayılan alanlar (ör. file=...) ekler.
+        previous = self._labels
+        self._labels = {**previous, **labels}
+        try:
+            yield
+        finally:
+            self._labels = previous
+
+    @contextmanager
+    def stage(self, name, **fields):
+        # Blok içinde record['rows'] vb. güncellenebilir; record['_discard'] = True kaydı atar.
+        record = {'stage': name, **self._labels, **fields}
+        if not self.enabled:
+            yield record
+            return
+        if self.trace_memory:
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if self.trace_memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                record['peak_mb'] = peak / (1024 * 1024)
+            record['max_rss_mb'] = max_rss_mb()
+            if not record.pop('_discard', False):
+                self.records.append(record)
+
+    def timed_iter(self, iterable, name, describe=None, **fields):
+        # Her next() çağrısını ayrı aşama olarak kaydeder; describe(öğe) -> ek alanlar (rows, sheet...).
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name, **fields) as record:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    record['_discard'] = True
+                    return
+                if describe:
+                    record.update(describe(item))
+            yield item
+
+    def extend(self, records):
+        if self.enabled:
+            self.records.extend(records)
+
+    def to_frame(self):
+        df = pd.DataFrame(self.records)
+        df = df.reindex(columns=RECORD_FIELDS + [c for c in df.columns if c not in RECORD_FIELDS])
+        # Ölçülemeyen değerler (None) NaN olur; özet ve tablolar sayısal sütunla çalışır.
+        for col in NUMERIC_FIELDS:
+            df[col] = pd.to_numeric(df[col])
+        return df
+
+    def summary(self):
+        # Aşama bazında toplam süre ve satır; ilk görülme sırasıyla.
+        df = self.to_frame()
+        if df.empty:
+            return df
+        summary = df.groupby('stage', sort=False).agg(
+            seconds=('seconds', 'sum'), rows=('rows', 'sum'), calls=('stage', 'size'),
+            peak_mb=('peak_mb', 'max'), max_rss_mb=('max_rss_mb', 'max'))
+        summary['rows_per_second'] = (summary['rows'] / summary['seconds'].where(summary['seconds'] > 0)).round(0)
+        return summary.reset_index()
+
+    def to_json(self, **extra):
+        payload = {**extra, 'trace_memory': self.memory_traced, 'records': self.records,
+                   'summary': self.summary().to_dict(orient='records')}
+        return json.dumps(payload, ensure_ascii=False, indent=2, default=str)
+
+NULL_RECORDER = PerfRecorder(enabled=False)
+
+# ==========================================
+# PROFİL MODU (cProfile / pyinstrument)
+# ==========================================
+# Sadece çağıran süreci kapsar; paralel modda işçi süreçlerindeki zaman görünmez.
+
+def profile_call(mode, func, *args, **kwargs):
+    # Dönüş: (func sonucu, metin rapor)
+    if mode == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            profiler.stop()
+        return result, profiler.output_text(unicode=True, color=False)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(40)
+    return result, report.getvalue()
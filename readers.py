@@ -0,0 +1,138 @@
+import importlib.util
+import io
+import time
+from datetime import date, datetime
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# ==========================================
+# EXCEL OKUMA KATMANI
+# ==========================================
+# Sayfalar tek tek okunur ve (sayfa_adı, ham_df) olarak verilir; tüm çalışma kitabı aynı anda
+# bellekte tutulmaz. Motor sırası: python-calamine (varsa) -> openpyxl read_only (sadece xlsx/xlsm)
+# -> pandas varsayılanı (içeriğe göre xlrd, odf vb.). Motor dosya imzasından seçilir, uzantıdan değil.
+
+CALAMINE_AVAILABLE = importlib.util.find_spec("python_calamine") is not None
+ZIP_MAGIC = b"PK\x03\x04"  # xlsx/xlsm (ve ods)
+
+def candidate_engines(file_bytes):
+    # openpyxl sadece zip tabanlı dosyaları açar; .xls'de denenirse BadZipFile verir.
+    engines = ["calamine"] if CALAMINE_AVAILABLE else []
+    if file_bytes[:4] == ZIP_MAGIC:
+        engines.append("openpyxl")
+    return engines + [None]
+
+def open_workbook(file_bytes, engine=None):
+    # pandas'ın openpyxl motoru çalışma kitabını zaten read_only modda açar. Bir motor dosyayı
+    # açamazsa (eksik paket, desteklenmeyen biçim, bozuk içerik) sıradaki denenir; hepsi
+    # başarısızsa son hata yükselir.
+    engines = [engine] if engine else candidate_engines(file_bytes)
+    last_error = None
+    for candidate in engines:
+        try:
+            return pd.ExcelFile(io.BytesIO(file_bytes), engine=candidate), candidate or "auto"
+        except Exception as e:
+            last_error = e
+    raise last_error
+
+def list_sheet_names(file_bytes, engine=None):
+    xls, _ = open_workbook(file_bytes, engine)
+    with xls:
+        return list(xls.sheet_names)
+
+def iter_sheets(file_bytes, sheet_names=None, engine=None, timings=None, errors=None):
+    # timings verilirse doldurulur: {'engine', 'open', 'sheets': {sayfa: sn}, 'total'}
+    # errors (liste) verilirse okunamayan sayfa (sayfa_adı, mesaj) olarak eklenip atlanır; yoksa hata yükselir.
+    start = time.perf_counter()
+    xls, used_engine = open_workbook(file_bytes, engine)
+    if timings is not None:
+        timings.update({'engine': used_engine, 'open': time.perf_counter() - start, 'sheets': {}, 'total': 0.0})
+    with xls:
+        for sheet_name in (sheet_names if sheet_names is not None else xls.sheet_names):
+            sheet_start = time.perf_counter()
+            try:
+                raw_df = xls.parse(sheet_name, header=None, dtype=str)
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors.append((sheet_name, str(e)))
+                raw_df = None
+            if timings is not None:
+                elapsed = time.perf_counter() - sheet_start
+                timings['sheets'][sheet_name] = elapsed
+                timings['total'] = timings['open'] + sum(timings['sheets'].values())
+            if raw_df is not None:
+                yield sheet_name, raw_df
+
+# ==========================================
+# AKIŞ (SATIR SATIR) OKUMA
+# ==========================================
+# Büyük listeler için sayfa DataFrame'e çevrilmeden satır satır okunur. Hücre dönüşümü
+# pandas'ın Excel okuyucularıyla aynıdır; rows_to_frame parça satırlarını read_excel'in
+# kullandığı TextParser'dan geçirir (boş ve "NA" benzeri hücreler NaN, diğerleri metin).
+
+def convert_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+def _iter_calamine_rows(sheet):
+    # to_python(skip_empty_area=False) gibi: kullanılan alanın solundaki boş sütunlar da verilir.
+    leading = [""] * sheet.start[1] if sheet.start else []
+    for row in sheet.iter_rows():
+        yield leading + [convert_cell(v) for v in row]
+
+def _iter_openpyxl_rows(sheet):
+    # pandas gibi: dosyadaki boyut bilgisine güvenilmez, satır sonundaki boş hücreler atılır.
+    sheet.reset_dimensions()
+    for row in sheet.iter_rows(values_only=True):
+        values = [convert_cell(v) for v in row]
+        while values and values[-1] == "":
+            values.pop()
+        yield values
+
+def _iter_frame_rows(raw_df):
+    # iter_sheets çerçevesini satır listelerine çevirir; boş hücreler diğer motorlardaki gibi "".
+    for row in raw_df.itertuples(index=False, name=None):
+        yield ["" if pd.isna(v) else v for v in row]
+
+def streaming_engine(file_bytes):
+    # xlsx (zip) dosyalarında openpyxl read_only satırları gerçekten akıtır; calamine sayfayı bütün
+    # olarak yükler. Diğer biçimler (.xls) calamine ile, o da yoksa pandas ile (None) sayfa sayfa okunur.
+    if file_bytes[:4] == ZIP_MAGIC:
+        return "openpyxl"
+    return "calamine" if CALAMINE_AVAILABLE else None
+
+def iter_sheet_rows(file_bytes, sheet_names=None, engine=None):
+    # (sayfa_adı, satır_üreteci) verir; bir sonraki sayfaya geçmeden önce üreteç tüketilmelidir.
+    engine = engine or streaming_engine(file_bytes)
+    if engine is None:
+        for sheet_name, raw_df in iter_sheets(file_bytes, sheet_names):
+            yield sheet_name, _iter_frame_rows(raw_df)
+        return
+    if engine == "calamine":
+        from python_calamine import CalamineWorkbook
+        workbook = CalamineWorkbook.from_filelike(io.BytesIO(file_bytes))
+        for sheet_name in (sheet_names if sheet_names is not None else workbook.sheet_names):
+            yield sheet_name, _iter_calamine_rows(workbook.get_sheet_by_name(sheet_name))
+        return
+    from openpyxl import load_workbook
+    workbook = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        for sheet_name in (sheet_names if sheet_names is not None else workbook.sheetnames):
+            yield sheet_name, _iter_openpyxl_rows(workbook[sheet_name])
+    finally:
+        workbook.close()
+
+def rows_to_frame(rows):
+    # Satırlar en geniş satıra tamamlanır; sonuç read_excel(header=None, dtype=str) ile aynı tiplerdedir.
+    width = max((len(row) for row in rows), default=0)
+    if width == 0:
+        return pd.DataFrame(index=range(len(rows)))
+    padded = [row + [""] * (width - len(row)) if len(row) < width else row for row in rows]
+    return TextParser(padded, header=None, dtype=str, skip_blank_lines=False).read()
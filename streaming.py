@@ -0,0 +1,241 @@
+import itertools
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from cache import content_hash
+from export import StreamingExcelWriter, TmaxxCsvAppender, merged_row_styles, skipped_row_styles
+from pipeline import (HELPER_COLUMNS, HISTORY_MATCH_COLUMNS, MERGED_EXCEL_NAME, SKIPPED_EXCEL_NAME, TMAXX_ZIP_NAME,
+                      PipelineResult, check_history, error_rows_frame, invalid_length_mask, record_frame_history)
+from processing import (FLAG_CNTR_DUPLICATE, FLAG_CNTR_SEEN, FLAG_INVALID_LENGTH, FLAG_MBL_DUPLICATE, FLAG_MBL_SEEN,
+                        HEADER_SEARCH_ROWS, detect_header, make_columns_unique, process_smart_rows)
+from profiling import PerfRecorder
+from readers import iter_sheet_rows, rows_to_frame
+
+# ==========================================
+# AKIŞ MODU: SABİT BOYUTLU PARÇALARLA İŞLEME
+# ==========================================
+# Çok büyük listeler için: satırlar chunk_size'lık parçalar halinde okunup işlenir, liste hiçbir
+# aşamada bütün olarak bellekte olmaz. Mükerrer kontrolü (keep=False: ilk kayıt da işaretlenir)
+# tüm veriyi gerektirdiğinden işlenmiş parçalar geçici klasöre yazılır ve üç geçiş yapılır:
+#   1) okuma + process_smart_rows -> diske parça
+#   2) parçalardan mükerrer konteyner/MBL kümeleri (64 bit anahtar hash'leri, numpy)
+#   3) parçalar işaretlenip Excel (constant_memory), Tmaxx ve CSV yazıcılarına eklenir.
+# Bellek: bir parça + satır başına 24 baytlık hash dizileri (metin kümesi yerine).
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+def iter_sheet_chunks(rows, chunk_size, header_layouts=None):
+    # Başlık ilk HEADER_SEARCH_ROWS satırda aranır; gövde başlık sütunlarıyla parça parça verilir.
+    # Başlık bulunamayan sayfa için hiçbir şey üretilmez.
+    window = list(itertools.islice(rows, HEADER_SEARCH_ROWS))
+    if not window:
+        return
+    header = detect_header(rows_to_frame(window).to_numpy(dtype=object), header_layouts)
+    if header is None:
+        return
+    header_idx, header_values = header
+    body = itertools.chain(window[header_idx + 1:], rows)
+    while True:
+        chunk_rows = list(itertools.islice(body, chunk_size))
+        if not chunk_rows:
+            return
+        chunk = rows_to_frame(chunk_rows)
+        # Başlıktan geniş satırlar, read_excel'deki gibi adsız (Unknown_Col) sütunlara düşer.
+        width = max(chunk.shape[1], len(header_values))
+        chunk = chunk.reindex(columns=range(width))
+        chunk.columns = make_columns_unique(list(header_values) + [None] * (width - len(header_values)))
+        yield chunk
+
+class _SpillStore:
+    # İşlenmiş parçaları sırayla pickle olarak yazar/okur.
+    def __init__(self, directory):
+        self.directory = directory
+        self._count = 0
+
+    def write(self, df):
+        path = os.path.join(self.directory, f"{self._count:06d}.pkl")
+        self._count += 1
+        with open(path, 'wb') as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @staticmethod
+    def read(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+def key_hashes(series):
+    return pd.util.hash_array(series.astype(str).to_numpy(dtype=object))
+
+def _collect_duplicate_keys(processed_paths):
+    # validate() ile aynı kurallar: CNTR tüm veride birden fazla; MBL birden fazla girdi satırında.
+    # Dönüş: mükerrer CNTR ve MBL hash'leri (sıralı uint64 dizileri).
+    cntr_parts, mbl_parts, row_parts = [], [], []
+    for path in processed_paths:
+        df = _SpillStore.read(path)
+        cntr_parts.append(key_hashes(df['CNTR NO']))
+        mbl_parts.append(key_hashes(df['MB/L NO']))
+        row_parts.append(df['INPUT_ROW_ID'].to_numpy(dtype=np.uint64))
+    cntr_hashes, counts = np.unique(np.concatenate(cntr_parts), return_counts=True)
+    cntr_dups = cntr_hashes[counts > 1]
+    del cntr_parts, cntr_hashes, counts
+    mbl_rows = np.unique(np.stack([np.concatenate(mbl_parts), np.concatenate(row_parts)]), axis=1)
+    mbl_hashes, counts = np.unique(mbl_rows[0], return_counts=True)
+    return cntr_dups, mbl_hashes[counts > 1]
+
+def _describe_chunk(chunk):
+    return {'rows': len(chunk)}
+
+def run_streaming(files, out_dir, chunk_size=DEFAULT_CHUNK_SIZE, history=None, record=False, plain_format=None,
+                  zip_tmaxx=False, on_progress=None, header_layouts=None, perf=None):
+    # write_outputs ile aynı dosyaları out_dir'e yazar. Dönüş: (PipelineResult [final_df yok], yazılan yollar).
+    # perf: aşamalar parça bazında kaydedilir (okuma, satır işleme, geçmiş kontrolü, dışa aktarma).
+    if plain_format not in (None, 'csv'):
+        raise ValueError("Akış modunda renksiz çıktı olarak sadece CSV desteklenir.")
+    perf = perf if perf is not None else PerfRecorder()
+    result = PipelineResult(perf=perf)
+    written = []
+
+    with tempfile.TemporaryDirectory(prefix="lojistik_akis_") as spill_dir:
+        store = _SpillStore(spill_dir)
+        processed_paths, skipped_paths = [], []
+        processed_columns, skipped_columns = {}, {}
+        row_offset = 0
+
+        # 1) Okuma ve satır işleme
+        for file_idx, (file_name, file_bytes) in enumerate(files):
+            file_processed, file_skipped = [], []
+            file_processed_columns, file_skipped_columns = {}, {}
+            file_hash = content_hash(file_bytes)
+            try:
+                for sheet_name, rows in iter_sheet_rows(file_bytes):
+                    chunks = iter_sheet_chunks(rows, chunk_size, header_layouts)
+                    for chunk in perf.timed_iter(chunks, "okuma", describe=_describe_chunk, file=file_name, sheet=sheet_name):
+                        with perf.stage("satır işleme", file=file_name, sheet=sheet_name, rows=len(chunk)):
+                            processed_df, skipped_df = process_smart_rows(chunk, row_offset)
+                        row_offset += len(chunk)
+                        if not processed_df.empty:
+                            processed_df['KAYNAK_DOSYA'] = file_name
+                            processed_df['KAYNAK_SAYFA'] = sheet_name
+                            processed_df['KAYNAK_HASH'] = file_hash
+                            file_processed_columns.update(dict.fromkeys(processed_df.columns))
+                            file_processed.append(store.write(processed_df))
+                        if not skipped_df.empty:
+                            skipped_df['KAYNAK_DOSYA'] = file_name
+                            skipped_df['KAYNAK_SAYFA'] = sheet_name
+                            file_skipped_columns.update(dict.fromkeys(skipped_df.columns))
+                            file_skipped.append(store.write(skipped_df))
+            except Exception as e:
+                result.errors.append((file_name, str(e)))
+                for path in file_processed + file_skipped:
+                    os.remove(path)
+            else:
+                processed_paths.extend(file_processed)
+                skipped_paths.extend(file_skipped)
+                processed_columns.update(file_processed_columns)
+                skipped_columns.update(file_skipped_columns)
+            if on_progress:
+                on_progress(file_idx + 1, len(files), file_name, 1, 1)
+
+        if not processed_paths:
+            return result, written
+
+        # 2) Mükerrer anahtarları
+        with perf.stage("mükerrer kontrolü") as stage:
+            cntr_dups, mbl_dups = _collect_duplicate_keys(processed_paths)
+            stage['rows'] = row_offset
+
+        # 3) İşaretleme ve yazma
+        os.makedirs(out_dir, exist_ok=True)
+        processed_columns = list(processed_columns)
+        display_columns = [c for c in processed_columns if c not in HELPER_COLUMNS]
+        error_columns = display_columns + ['HATA_NEDENI'] + (['ONCEKI_YUKLEME'] if history is not None else [])
+        skipped_export_columns = [c for c in skipped_columns if c not in HELPER_COLUMNS]
+        skipped_export_columns += [c for c in error_columns if c not in skipped_export_columns]
+
+        merged_path = os.path.join(out_dir, MERGED_EXCEL_NAME)
+        skipped_path = os.path.join(out_dir, SKIPPED_EXCEL_NAME)
+        merged_writer = StreamingExcelWriter(merged_path, 'Sheet1', display_columns)
+        skipped_writer = None
+        tmaxx = TmaxxCsvAppender(os.path.join(spill_dir if zip_tmaxx else out_dir, 'tmaxx'))
+        plain_path = os.path.join(out_dir, "BIRLESTIRILMIS_LISTE.csv")
+        plain_file = open(plain_path, 'w', encoding='utf-8-sig', newline='') if plain_format == 'csv' else None
+        history_summaries = []
+        stats = {'skipped': 0, 'duplicates_and_errors': 0, 'final': 0, 'history_matches': 0}
+
+        def append_skipped(df):
+            nonlocal skipped_writer
+            if skipped_writer is None:
+                skipped_writer = StreamingExcelWriter(skipped_path, 'Hatalar', skipped_export_columns)
+            df = df.reindex(columns=skipped_export_columns).fillna('')
+            skipped_writer.append(df, skipped_row_styles(df))
+            stats['skipped'] += len(df)
+
+        try:
+            for path in skipped_paths:
+                with perf.stage("dışa aktarma") as stage:
+                    skipped_df = _SpillStore.read(path)
+                    append_skipped(skipped_df)
+                    stage['rows'] = len(skipped_df)
+            for path in processed_paths:
+                df = _SpillStore.read(path).reindex(columns=processed_columns).fillna('')
+                with perf.stage("mükerrer işaretleme", rows=len(df)):
+                    flags = df['ERROR_FLAGS'].to_numpy(dtype=np.uint8, copy=True)
+                    flags[np.isin(key_hashes(df['CNTR NO']), cntr_dups)] |= FLAG_CNTR_DUPLICATE
+                    flags[np.isin(key_hashes(df['MB/L NO']), mbl_dups)] |= FLAG_MBL_DUPLICATE
+                    flags[invalid_length_mask(df)] |= FLAG_INVALID_LENGTH
+                    df['ERROR_FLAGS'] = flags
+                seen_info = None
+                if history is not None:
+                    with perf.stage("geçmiş kontrolü", rows=len(df)):
+                        seen_info, matches = check_history(df, history)
+                    history_summaries.append(matches)
+                with perf.stage("dışa aktarma", rows=len(df)):
+                    error_rows = error_rows_frame(df, seen_info)
+                    if not error_rows.empty:
+                        append_skipped(error_rows)
+                    display_df = df[display_columns]
+                    merged_writer.append(display_df, merged_row_styles(df))
+                    tmaxx.append(df)
+                    if plain_file is not None:
+                        display_df.to_csv(plain_file, index=False, header=stats['final'] == 0)
+                stats['final'] += len(df)
+                stats['duplicates_and_errors'] += len(error_rows)
+                stats['history_matches'] += int(((df['ERROR_FLAGS'].to_numpy() & (FLAG_CNTR_SEEN | FLAG_MBL_SEEN)) != 0).sum())
+        finally:
+            with perf.stage("excel kapatma", rows=stats['final']):
+                merged_writer.close()
+                if skipped_writer is not None:
+                    skipped_writer.close()
+            if plain_file is not None:
+                plain_file.close()
+
+        written.append(merged_path)
+        if skipped_writer is not None:
+            written.append(skipped_path)
+        if zip_tmaxx:
+            if tmaxx.file_names:
+                zip_path = os.path.join(out_dir, TMAXX_ZIP_NAME)
+                with perf.stage("tmaxx zip"):
+                    tmaxx.write_zip(zip_path)
+                written.append(zip_path)
+        else:
+            written.extend(tmaxx.paths())
+        if plain_file is not None:
+            written.append(plain_path)
+
+        if history is not None:
+            if history_summaries:
+                result.history_matches = pd.concat(history_summaries, ignore_index=True).drop_duplicates(subset=HISTORY_MATCH_COLUMNS[:2])
+            if record:
+                # Kayıt tüm kontrollerden sonra: aynı partideki diğer dosyalar "daha önce yüklenmiş" sayılmaz.
+                with perf.stage("geçmiş kaydı", rows=stats['final']):
+                    history.prune()
+                    stats['history_recorded'] = sum(record_frame_history(_SpillStore.read(path), history) for path in processed_paths)
+
+    result.stats = stats
+    return result, written
@@ -0,0 +1,38 @@
+import io
+import os
+import sys
+
+import openpyxl
+import pytest
+
+# Modüller depo kökünde düz dosyalar olarak durur.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing import iso6346_check_digit
+
+def container_number(owner, serial):
+    # Kontrol hanesi geçerli ISO 6346 numarası, ör. container_number("MSCU", 1234).
+    number = f"{owner}{serial:06d}"
+    return number + str(iso6346_check_digit(number + "0"))
+
+def manifest_rows(count, owner="MSCU"):
+    # Başlık üstünde iki satır bulunan basit yükleme listesi.
+    rows = [["LOADING LIST"], [], ["MB/L NO", "CONTAINER", "VOL", "V/V", "POL", "POD"]]
+    for i in range(count):
+        rows.append([f"MBL{i:05d}", container_number(owner, i), "40HC", "VESSEL 001E", "TRIST", "USNYC"])
+    return rows
+
+@pytest.fixture
+def make_workbook():
+    # {sayfa_adı: [[hücre, ...], ...]} -> .xlsx bytes
+    def build(sheets):
+        workbook = openpyxl.Workbook()
+        workbook.remove(workbook.active)
+        for sheet_name, rows in sheets.items():
+            sheet = workbook.create_sheet(sheet_name)
+            for row in rows:
+                sheet.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return buffer.getvalue()
+    return build
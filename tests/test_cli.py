@@ -0,0 +1,17 @@
+import os
+
+from cli import collect_input_files, load_header_layouts
+
+def test_cli_names_inputs_relative_to_root(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "manifest.xlsx").write_bytes(b"")
+    names = [name for _, name in collect_input_files([str(tmp_path / "**" / "*.xlsx")])]
+    assert names == [os.path.join("a", "manifest.xlsx"), os.path.join("b", "manifest.xlsx")]
+    assert [name for _, name in collect_input_files([str(tmp_path / "a")])] == ["manifest.xlsx"]
+
+def test_header_layouts_config(tmp_path):
+    path = tmp_path / "sablonlar.json"
+    path.write_text('{"A HAT": ["master b/l", " unit ", null], "B HAT": [["BL", "CNTR"], ["HBL", "CNTR"]]}', encoding="utf-8")
+    assert load_header_layouts(str(path)) == {
+        ("MASTER B/L", "UNIT"): "A HAT", ("BL", "CNTR"): "B HAT", ("HBL", "CNTR"): "B HAT"}
@@ -0,0 +1,33 @@
+from cache import ResultCache
+from conftest import container_number
+from processing import detect_header, file_cache_key, header_layout_key, ingest_files, process_file
+
+HEADER = ["MB/L NO", "CONTAINER", "VOL"]
+
+def test_cover_sheet_does_not_change_later_headers(make_workbook):
+    data = make_workbook({
+        "KAPAK": [["CONTAINER LIST"], ["prepared by ops"]],
+        "LISTE": [["CONTAINER LIST"], HEADER, ["MBL001", container_number("MSCU", 1), "40HC"]],
+    })
+    layouts = {}
+    results = dict((sheet_name, processed) for sheet_name, processed, _, _ in process_file("a.xlsx", data, header_layouts=layouts))
+    assert layouts == {}
+    assert list(results["LISTE"].columns[:4]) == ["INPUT_ROW_ID", "MB/L NO", "CNTR NO", "VOL"]
+    assert results["LISTE"]["CNTR NO"].tolist() == [container_number("MSCU", 1)]
+
+def test_known_layout_matches_without_scoring():
+    layout = ["BL", "UNIT"]
+    rows = [["CONTAINER LIST", "POL POD"], layout, ["MBL001", "MSCU0000010"]]
+    assert detect_header(rows) == (0, rows[0])
+    assert detect_header(rows, {header_layout_key(layout): "taşıyıcı"}) == (1, layout)
+
+def test_cache_is_keyed_by_header_layouts(make_workbook):
+    layout = ["MASTER B/L", "UNIT"]
+    data = make_workbook({"S1": [["CONTAINER LIST", "POL POD"], layout, ["MBL001", container_number("MSCU", 1)]]})
+    cache = ResultCache()
+    without_layouts, _, _, _ = ingest_files([("a.xlsx", data)], cache=cache)
+    with_layouts, _, _, _ = ingest_files([("a.xlsx", data)], cache=cache, header_layouts={header_layout_key(layout): "taşıyıcı"})
+    assert sum(len(df) for df in without_layouts) == 0
+    assert [df['MB/L NO'].tolist() for df in with_layouts] == [["MBL001"]]
+    assert file_cache_key(data) != file_cache_key(data, {header_layout_key(layout): "başka ad"})
+    assert file_cache_key(data, {("A",): 1, ("B",): 2}) == file_cache_key(data, {("B",): 2, ("A",): 1})
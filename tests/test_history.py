@@ -0,0 +1,43 @@
+from conftest import container_number, manifest_rows
+from history import KIND_CNTR, HistoryIndex
+from pipeline import record_history, run_pipeline
+
+OLD = "2020-01-01 00:00:00"
+
+def test_expired_key_is_replaced_not_pruned(tmp_path):
+    history = HistoryIndex(str(tmp_path / "history.sqlite"), retention_days=90)
+    history.record(KIND_CNTR, [("MSCU0000010", "eski.xlsx", "S1", "h1")], seen_at=OLD)
+
+    assert history.record(KIND_CNTR, [("MSCU0000010", "yeni.xlsx", "S1", "h2")]) == 1
+    assert history.prune() == 0
+    found = history.lookup(KIND_CNTR, ["MSCU0000010"])
+    assert found['file_name'].tolist() == ["yeni.xlsx"]
+
+def test_recent_key_keeps_first_record(tmp_path):
+    history = HistoryIndex(str(tmp_path / "history.sqlite"), retention_days=90)
+    history.record(KIND_CNTR, [("MSCU0000010", "ilk.xlsx", "S1", "h1")])
+    assert history.record(KIND_CNTR, [("MSCU0000010", "ikinci.xlsx", "S1", "h2")]) == 0
+    assert history.lookup(KIND_CNTR, ["MSCU0000010"])['file_name'].tolist() == ["ilk.xlsx"]
+
+def test_record_history_keeps_reloaded_expired_keys(make_workbook, tmp_path):
+    cntr = container_number("MSCU", 7)
+    history = HistoryIndex(str(tmp_path / "history.sqlite"), retention_days=90)
+    history.record(KIND_CNTR, [(cntr, "eski.xlsx", "S1", "h1")], seen_at=OLD)
+    data = make_workbook({"S1": [["MB/L NO", "CONTAINER", "VOL"], ["MBL001", cntr, "40HC"]]})
+
+    result = run_pipeline([("yeni.xlsx", data)], history=history)
+    assert result.stats['history_matches'] == 0
+    record_history(result, history)
+    assert history.lookup(KIND_CNTR, [cntr])['file_name'].tolist() == ["yeni.xlsx"]
+
+def test_same_named_inputs_keep_their_own_hash(make_workbook, tmp_path):
+    history = HistoryIndex(str(tmp_path / "history.sqlite"))
+    first = make_workbook({"S1": manifest_rows(3)})
+    second = make_workbook({"S1": manifest_rows(2), "S2": manifest_rows(1, owner="TGHU")})
+    record_history(run_pipeline([("manifest.xlsx", first)], history=history), history)
+
+    alone = run_pipeline([("manifest.xlsx", second)], history=history)
+    together = run_pipeline([("manifest.xlsx", second), ("manifest.xlsx", first)], history=history)
+    assert alone.stats['history_matches'] > 0
+    # İkinci dosyanın kendi satırları (aynı içerik) eşleşme sayılmaz; ilk dosyanınkiler sayılır.
+    assert together.stats['history_matches'] == alone.stats['history_matches']
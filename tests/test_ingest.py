@@ -0,0 +1,74 @@
+import processing
+from cache import ResultCache
+from conftest import manifest_rows
+from history import HistoryIndex
+from pipeline import record_history, run_pipeline
+
+def test_renamed_reupload_through_cache(make_workbook, tmp_path):
+    data = make_workbook({"SHEET1": manifest_rows(5), "SHEET2": manifest_rows(3, owner="TGHU")})
+    cache = ResultCache()
+    history = HistoryIndex(str(tmp_path / "history.sqlite"))
+
+    first = run_pipeline([("ilk.xlsx", data)], cache=cache, history=history)
+    record_history(first, history)
+    renamed = run_pipeline([("yeni_ad.xlsx", data)], cache=cache, history=history)
+    uncached = run_pipeline([("yeni_ad.xlsx", data)], history=history)
+
+    assert cache.stats()['hits'] > 0
+    assert set(renamed.final_df['KAYNAK_DOSYA']) == {"yeni_ad.xlsx"}
+    assert list(renamed.final_df.columns) == list(uncached.final_df.columns)
+    # Aynı içerik kendi geçmiş kaydıyla eşleşmez; bayraklar önbelleksiz çalışmayla aynıdır.
+    assert renamed.stats['history_matches'] == 0
+    assert renamed.final_df['ERROR_FLAGS'].tolist() == uncached.final_df['ERROR_FLAGS'].tolist()
+    assert set(first.final_df['KAYNAK_DOSYA']) == {"ilk.xlsx"}
+
+def test_failing_sheet_keeps_other_sheets(make_workbook, monkeypatch):
+    original = processing.process_smart_rows
+    def process_or_fail(df, row_id_offset=0):
+        if (df.to_numpy() == "BOZUK").any():
+            raise ValueError("bozuk satır")
+        return original(df, row_id_offset)
+    monkeypatch.setattr(processing, "process_smart_rows", process_or_fail)
+    bad_rows = manifest_rows(2) + [["BOZUK"]]
+    data = make_workbook({"S1": manifest_rows(3), "S2": bad_rows, "S3": manifest_rows(2, owner="TGHU")})
+    cache = ResultCache()
+
+    all_dfs, _, errors, _ = processing.ingest_files([("a.xlsx", data)], cache=cache)
+    assert [df['KAYNAK_SAYFA'].iloc[0] for df in all_dfs] == ["S1", "S3"]
+    assert errors == [("a.xlsx", "'S2' sayfası: bozuk satır")]
+    # Biten sayfalar önbellekte; eksik sayfa listesi önbelleğe alınmaz.
+    file_hash = processing.file_cache_key(data)
+    assert cache.get((file_hash, "S3")) is not None
+    assert cache.get(('sheets', file_hash)) is None
+
+def test_parallel_matches_sequential(make_workbook):
+    files = [("a.xlsx", make_workbook({"S1": manifest_rows(3), "S2": manifest_rows(2, owner="TGHU")})),
+             ("b.xlsx", make_workbook({"S1": manifest_rows(4, owner="CAIU")}))]
+    sequential, _, sequential_errors, _ = processing.ingest_files(files)
+    parallel, _, parallel_errors, _ = processing.ingest_files(files, max_workers=2)
+    assert sequential_errors == parallel_errors == []
+    assert len(sequential) == len(parallel)
+    for left, right in zip(sequential, parallel):
+        assert left.equals(right)
+
+def test_progress_is_reported_per_file(make_workbook):
+    files = [("a.xlsx", make_workbook({"S1": manifest_rows(3), "S2": manifest_rows(2, owner="TGHU")})),
+             ("b.xlsx", make_workbook({"S1": manifest_rows(4, owner="CAIU")}))]
+    cache = ResultCache()
+    calls = []
+    processing.ingest_files(files, cache=cache, on_progress=lambda *args: calls.append(args))
+    # Sayfa listesi bilinmeyen dosya sıralı modda tek birimdir.
+    assert calls == [(1, 2, "a.xlsx", 1, 1), (2, 2, "b.xlsx", 1, 1)]
+
+    calls.clear()
+    processing.ingest_files(files, cache=cache, on_progress=lambda *args: calls.append(args))
+    assert calls == [(3, 3, "a.xlsx", 2, 2), (3, 3, "b.xlsx", 1, 1)]
+
+def test_error_rows_join_skipped_rows(make_workbook):
+    rows = manifest_rows(3) + [["MBL99999", "", "40HC"]]
+    rows[4][1] = rows[3][1]
+    result = run_pipeline([("a.xlsx", make_workbook({"S1": rows}))])
+    reasons = result.skipped_df['HATA_NEDENI'].tolist()
+    assert reasons[0] == "EKSİK KONTEYNER NO"
+    assert len(reasons) == 3
+    assert (result.skipped_df['KAYNAK_HASH'].iloc[1:] != '').all()
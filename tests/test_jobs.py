@@ -0,0 +1,70 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import jobs
+from jobs import JOB_DONE, JOB_QUEUED, JOB_RUNNING, JobLimitError, JobManager
+from conftest import manifest_rows
+
+def wait_until(condition, timeout=60):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+def test_queue_position_follows_fair_share_order():
+    manager = JobManager(max_running=0, max_per_owner=2)
+    first_a = manager.submit("A", [])
+    second_a = manager.submit("A", [])
+    only_b = manager.submit("B", [])
+    positions = {job_id: manager.status(job_id)['queue_position'] for job_id in (first_a, second_a, only_b)}
+    assert positions == {first_a: 1, only_b: 2, second_a: 3}
+    assert manager.status(only_b)['status'] == JOB_QUEUED
+
+def test_status_reports_done_and_total_per_file(make_workbook):
+    manager = JobManager()
+    data = make_workbook({"S1": manifest_rows(2), "S2": manifest_rows(2, owner="TGHU")})
+    job_id = manager.submit("A", [("a.xlsx", data)])
+    deadline = time.time() + 60
+    while manager.status(job_id)['status'] != JOB_DONE and time.time() < deadline:
+        time.sleep(0.05)
+    status = manager.status(job_id)
+    assert status['status'] == JOB_DONE
+    assert status['files'] == [("a.xlsx", 1, 1)]
+    assert (status['done'], status['total']) == (1, 1)
+
+def test_abandoned_running_job_frees_owner_slot_and_drops_result(monkeypatch):
+    release = threading.Event()
+    def slow_pipeline(files, **options):
+        release.wait(60)
+        return SimpleNamespace(final_df=None)
+    monkeypatch.setattr(jobs, "run_pipeline", slow_pipeline)
+    manager = JobManager(max_running=2, max_per_owner=1)
+    old = manager.submit("A", [])
+    assert manager.status(old)['status'] == JOB_RUNNING
+    with pytest.raises(JobLimitError):
+        manager.submit("A", [])
+
+    assert manager.abandon(old)
+    new = manager.submit("A", [])
+    release.set()
+    assert wait_until(lambda: manager.status(new)['status'] == JOB_DONE)
+    assert wait_until(lambda: manager.status(old) is None)
+    assert manager.collect(old) is None
+    assert manager.collect(new) is not None
+
+def test_abandoned_queued_job_is_removed():
+    manager = JobManager(max_running=0)
+    job_id = manager.submit("A", [])
+    assert manager.abandon(job_id)
+    assert manager.status(job_id) is None
+    assert manager.overview()['queued'] == 0
+    assert not manager.abandon(job_id)
+
+def test_status_expires_finished_jobs(monkeypatch):
+    monkeypatch.setattr(jobs, "run_pipeline", lambda files, **options: SimpleNamespace(final_df=None))
+    manager = JobManager(finished_ttl=0)
+    job_id = manager.submit("A", [])
+    assert wait_until(lambda: manager.status(job_id) is None)
@@ -0,0 +1,175 @@
+import random
+import re
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing import process_smart_rows
+
+# ==========================================
+# İLK SÜRÜMÜN SATIR SATIR (iterrows) UYGULAMASI — DONDURULMUŞ KOPYA
+# ==========================================
+# Vektörel process_smart_rows bununla aynı satırları üretmelidir. Sonradan eklenen alanlar
+# (sayısal INPUT_ROW_ID, ERROR_FLAGS) karşılaştırılmaz. Tokenizer'ın bilinçli olarak ayrıldığı
+# durumlar (konteyner numarasının kendi rakamlarından ya da yapışık koddan tip okunması) üreticide yoktur.
+
+def extract_container_from_full_row(row):
+    row_str = " ".join([str(val).upper() for val in row.values])
+    row_str = row_str.replace('/', ' ').replace(',', ' ').replace('&', ' ').replace(';', ' ').replace('-', ' ').replace(':', ' ')
+    matches = re.findall(r'\b[A-Z]{4}\s*\d{5,8}\b', row_str)
+    valid_containers = []
+    for m in matches:
+        clean_m = m.replace(" ", "").replace("\t", "")
+        if 9 <= len(clean_m) <= 12:
+            valid_containers.append(clean_m)
+    return valid_containers
+
+def extract_volume_from_full_row(row):
+    row_str = " ".join([str(val).upper() for val in row.values])
+    types = set()
+    if re.search(r'40\s*(HC|HQ|H/C)', row_str): types.add("40HC")
+    if re.search(r'45\s*(HC|HQ|FT|\'|")', row_str): types.add("45HC")
+    if re.search(r'20\s*(DC|GP|DV|ST|FT|\'|")', row_str): types.add("20DC")
+    if re.search(r'40\s*(DC|GP|DV|ST)', row_str): types.add("40DC")
+    elif re.search(r'40\s*(\'|")', row_str) and "40HC" not in types: types.add("40DC")
+    if len(types) > 1: return "⚠️ ŞÜPHELİ (KARIŞIK TİP)"
+    elif len(types) == 1: return list(types)[0]
+    else: return ""
+
+def extract_vessel_info_smart(row, current_v_v_col):
+    for val in row.values:
+        val_str = str(val).strip()
+        if "=>" in val_str: return val_str
+    if current_v_v_col:
+        val = str(row[current_v_v_col]).strip()
+        if val.upper() not in ['NAN', 'NONE', '']: return val
+    return ""
+
+def clean_mbl_column(val):
+    return str(val).upper().strip().replace(" ", "")
+
+def baseline_process_smart_rows(df):
+    mbl_col_name = next((c for c in df.columns if "MB/L" in str(c).upper() or "MASTER" in str(c).upper()), None)
+    vv_col_name = next((c for c in df.columns if "V/V" in str(c).upper() or "VESSEL" in str(c).upper()), None)
+
+    new_rows = []
+    skipped_rows = []
+
+    for _, row in df.iterrows():
+        if row.astype(str).str.strip().replace(['NAN', 'NONE', ''], pd.NA).isna().all():
+            continue
+
+        input_row_id = str(uuid.uuid4())
+
+        mbl_val = ""
+        if mbl_col_name:
+            raw_mbl = str(row[mbl_col_name]).upper().strip()
+            if raw_mbl not in ['NAN', 'NONE', '', 'NA', 'UNKNOWN_COL']:
+                mbl_val = clean_mbl_column(raw_mbl)
+
+        containers = extract_container_from_full_row(row)
+        ctype = extract_volume_from_full_row(row)
+        vessel_val = extract_vessel_info_smart(row, vv_col_name)
+
+        if mbl_val and containers:
+            for cntr in containers:
+                teu_val = ''
+                if "ŞÜPHELİ" in ctype: teu_val = ""
+                elif '40' in ctype or '45' in ctype: teu_val = 2
+                elif '20' in ctype: teu_val = 1
+
+                row_data = {
+                    "INPUT_ROW_ID": input_row_id,
+                    "MB/L NO": mbl_val,
+                    "CNTR NO": cntr,
+                    "VOL": ctype if ctype else "Unknown",
+                    "TEU": teu_val,
+                    "V/V": vessel_val
+                }
+                for col in ["POL", "POD", "BOOKING NO"]:
+                     actual_col = next((c for c in df.columns if col in str(c).upper()), None)
+                     if actual_col: row_data[col] = str(row[actual_col])
+                new_rows.append(row_data)
+
+        else:
+            row_dict = row.to_dict()
+            if not mbl_val and not containers:
+                row_dict['HATA_NEDENI'] = "MBL VE KONTEYNER NO BULUNAMADI"
+            elif not mbl_val:
+                row_dict['HATA_NEDENI'] = "EKSİK MBL NO"
+            else:
+                row_dict['HATA_NEDENI'] = "EKSİK KONTEYNER NO"
+
+            row_dict['BULUNAN_MBL'] = mbl_val if mbl_val else "YOK"
+            row_dict['BULUNAN_CNTR'] = ", ".join(containers) if containers else "YOK"
+            skipped_rows.append(row_dict)
+
+    return pd.DataFrame(new_rows), pd.DataFrame(skipped_rows)
+
+# ==========================================
+# DAĞINIK SAYFA ÜRETİCİSİ
+# ==========================================
+
+EMPTY_CELLS = [np.nan, None, "", "  ", "nan", "NONE"]
+MBL_CELLS = ["NA", "Unknown_Col", " mbl 7781 ", "MEDU12345678"]
+VOLUME_CELLS = ["40HC", "40 HQ", "40H/C", "20'", '20"', "20GP", "40DC", "40'", "45FT", "45 HC", "2X40HC", "20DC/40HC", "40' 40HC", "TBA"]
+VESSEL_CELLS = ["MSC ANNA 412W", "EVER GIVEN / 021E", "CMA CGM => FEEDER 12N"]
+NOTE_CELLS = ["OK", "URGENT", "TS => X-PRESS 33S", 15, 3.5, "ref 2024/118"]
+SEPARATORS = [", ", "/", " & ", "; ", " - ", "\n", " "]
+
+def random_container(rnd):
+    owner = "".join(rnd.choice("ABCDEFGHIJKLMNOPRSTUVWXYZ") for _ in range(3)) + "U"
+    digits = "".join(rnd.choice("0123456789") for _ in range(rnd.choice([5, 6, 7, 7, 7, 8])))
+    return owner + rnd.choice(["", "", " ", "-"]) + digits
+
+def random_cell(rnd, column):
+    if rnd.random() < 0.15:
+        return rnd.choice(EMPTY_CELLS)
+    if column == "MB/L NO":
+        return rnd.choice(MBL_CELLS) if rnd.random() < 0.2 else f"MBL{rnd.randrange(10**6):06d}"
+    if column == "CNTR":
+        count = rnd.choice([1, 1, 1, 2, 3])
+        cell = rnd.choice(SEPARATORS).join(random_container(rnd) for _ in range(count))
+        return cell.lower() if rnd.random() < 0.1 else cell
+    if column == "VOL":
+        return rnd.choice(VOLUME_CELLS)
+    if column == "V/V":
+        return rnd.choice(VESSEL_CELLS)
+    if column in ("POL", "POD"):
+        return rnd.choice(["TRIST", "TRMER", "USNYC", "DEHAM"])
+    if column == "BOOKING NO":
+        return rnd.choice([f"BK{rnd.randrange(10**5)}", rnd.randrange(10**5)])
+    return rnd.choice(NOTE_CELLS)
+
+def random_sheet(seed, rows=60):
+    # Okuyucuların verdiği biçim: read_excel(header=None, dtype=str) gibi metin sütunları, boş hücreler NaN.
+    rnd = random.Random(seed)
+    columns = ["MB/L NO", "CNTR", "VOL", "V/V", "POL", "POD", "BOOKING NO", "NOTE"]
+    columns = [c for c in columns if c in ("CNTR", "NOTE") or rnd.random() < 0.85]
+    data = []
+    for _ in range(rows):
+        if rnd.random() < 0.05:
+            data.append([np.nan] * len(columns))
+        elif rnd.random() < 0.05:
+            data.append([rnd.choice(EMPTY_CELLS) for _ in columns])
+        else:
+            data.append([random_cell(rnd, c) for c in columns])
+    return pd.DataFrame(data, columns=columns, dtype=str)
+
+def comparable(df):
+    return df.drop(columns=['INPUT_ROW_ID', 'ERROR_FLAGS'], errors='ignore').reset_index(drop=True)
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_row_wise_baseline(seed):
+    df = random_sheet(seed)
+    expected_processed, expected_skipped = baseline_process_smart_rows(df)
+    processed, skipped = process_smart_rows(df)
+    pd.testing.assert_frame_equal(comparable(processed), comparable(expected_processed), check_dtype=False)
+    pd.testing.assert_frame_equal(comparable(skipped), comparable(expected_skipped), check_dtype=False)
+
+def test_rows_of_one_input_row_share_input_row_id():
+    df = pd.DataFrame([["MBL1", "ABCU1234567 / DEFU7654321"], ["MBL2", "GHIU1111111"]], columns=["MB/L NO", "CNTR"], dtype=str)
+    processed, _ = process_smart_rows(df, row_id_offset=10)
+    assert processed['INPUT_ROW_ID'].tolist() == [10, 10, 11]
@@ -0,0 +1,18 @@
+import json
+
+import profiling
+from profiling import PerfRecorder
+
+def test_recorder_without_resource_module(monkeypatch):
+    # Windows'ta resource modülü yoktur; süreç tepe belleği boş kalır, özet yine hesaplanır.
+    monkeypatch.setattr(profiling, "resource", None)
+    assert profiling.max_rss_mb() is None
+    perf = PerfRecorder()
+    for rows in (3, 4):
+        with perf.stage("oku") as record:
+            record['rows'] = rows
+    summary = perf.summary()
+    assert summary['rows'].tolist() == [7]
+    assert summary['max_rss_mb'].isna().all()
+    assert summary.round(3)['calls'].tolist() == [2]
+    assert json.loads(perf.to_json())['records'][0]['max_rss_mb'] is None
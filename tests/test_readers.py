@@ -0,0 +1,38 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+import readers
+from readers import candidate_engines, iter_sheet_rows, open_workbook, rows_to_frame
+
+# Eski .xls (OLE2) imzası; pandas biçimi buradan tanır.
+FAKE_XLS = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 504
+
+def test_openpyxl_is_only_tried_on_zip_files(make_workbook):
+    assert "openpyxl" in candidate_engines(make_workbook({"S1": [["A"]]}))
+    assert "openpyxl" not in candidate_engines(FAKE_XLS)
+    assert candidate_engines(FAKE_XLS)[-1] is None
+
+def test_xls_without_calamine_reaches_pandas_default(monkeypatch):
+    # openpyxl denenseydi BadZipFile ile dururdu; pandas varsayılanı .xls için xlrd ister.
+    monkeypatch.setattr(readers, "CALAMINE_AVAILABLE", False)
+    with pytest.raises(Exception) as excinfo:
+        open_workbook(FAKE_XLS)
+    assert not isinstance(excinfo.value, zipfile.BadZipFile)
+
+def test_engine_failure_falls_back_to_next(make_workbook, monkeypatch):
+    monkeypatch.setattr(readers, "candidate_engines", lambda file_bytes: ["olmayan_motor", "openpyxl"])
+    xls, engine = open_workbook(make_workbook({"S1": [["A"]]}))
+    with xls:
+        assert engine == "openpyxl"
+        assert xls.sheet_names == ["S1"]
+
+def test_frame_fallback_rows_match_streaming_rows(make_workbook, monkeypatch):
+    data = make_workbook({"S1": [["MB/L NO", "CONTAINER"], [None, "MSCU1234567"], ["MBL1", 40], [], ["x", 2.5]]})
+    streamed = {name: rows_to_frame(list(rows)) for name, rows in iter_sheet_rows(data, engine="openpyxl")}
+    monkeypatch.setattr(readers, "streaming_engine", lambda file_bytes: None)
+    fallback = {name: rows_to_frame(list(rows)) for name, rows in iter_sheet_rows(data)}
+    assert streamed.keys() == fallback.keys()
+    for name in streamed:
+        pd.testing.assert_frame_equal(streamed[name], fallback[name])
@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+
+from conftest import container_number, manifest_rows
+from pipeline import run_pipeline, write_outputs
+from streaming import run_streaming
+
+def read_outputs(out_dir):
+    # Excel çıktıları içerik olarak (biçim/stiller hariç), CSV'ler bayt olarak karşılaştırılır.
+    outputs = {}
+    for root, _, names in os.walk(out_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            key = os.path.relpath(path, out_dir)
+            if name.endswith(".xlsx"):
+                outputs[key] = pd.read_excel(path, sheet_name=None, dtype=str)
+            else:
+                with open(path, 'rb') as f:
+                    outputs[key] = f.read()
+    return outputs
+
+def test_small_chunks_match_batch_outputs(make_workbook, tmp_path):
+    repeated = container_number("TGHU", 7)
+    first = manifest_rows(7)
+    first[4][1] = repeated  # ilk parçada
+    first[9][1] = repeated  # üçüncü parçada
+    first[8][0] = first[3][0]  # MBL farklı parçadaki satırda tekrar
+    first.insert(6, ["MBL99999", "", "40HC"])  # konteynersiz satır
+    second = manifest_rows(4, owner="CAIU")
+    second[5][1] = repeated  # diğer sayfada
+    second.append(["MBL00001", "ABCU12345", "20DV"])  # uzunluk hatası
+    files = [("a.xlsx", make_workbook({"S1": first, "S2": second})), ("b.xlsx", make_workbook({"S1": manifest_rows(3, owner="MSKU")}))]
+
+    batch = run_pipeline(files)
+    write_outputs(batch, str(tmp_path / "batch"), plain_format="csv")
+    streamed, _ = run_streaming(files, str(tmp_path / "stream"), chunk_size=3, plain_format="csv")
+
+    assert streamed.stats == batch.stats
+    expected, actual = read_outputs(tmp_path / "batch"), read_outputs(tmp_path / "stream")
+    assert expected.keys() == actual.keys()
+    for key, value in expected.items():
+        if isinstance(value, dict):
+            assert value.keys() == actual[key].keys()
+            for sheet_name, frame in value.items():
+                pd.testing.assert_frame_equal(actual[key][sheet_name], frame)
+        else:
+            assert actual[key] == value, key
@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+from processing import SUSPICIOUS_VOLUME, iso6346_check_digit, iso6346_check_ok, tokenize_row, tokenize_rows
+
+@pytest.mark.parametrize("text, volume", [
+    ("20'DV", "20DC"),
+    ("20'GP", "20DC"),
+    ("20' DV", "20DC"),
+    ("40'HC", "40HC"),
+    ("40'HQ", "40HC"),
+    ('40"HC', "40HC"),
+    ("45'HC", "45HC"),
+    ("40'", "40DC"),
+    ("40' 40HC", "40HC"),
+    ("1X20GP", "20DC"),
+    ("20DC / 40HC", SUSPICIOUS_VOLUME),
+    ("TBA", ""),
+])
+def test_volume_codes(text, volume):
+    assert tokenize_row(text)[1] == volume
+    assert tokenize_rows(pd.Series([text]))[2].tolist() == [volume]
+
+def test_container_digits_are_not_volume_codes():
+    # Konteyner numarasının kendi rakamları ve harfe yapışık kod tip sayılmaz.
+    assert tokenize_row("MSCU1234540'") == (["MSCU1234540"], "", [False])
+    assert tokenize_row("40 DCYU1234567")[1] == ""
+
+def test_known_check_digits():
+    assert iso6346_check_digit("CSQU3054383") == 3
+    assert tokenize_row("CSQU3054383 40HC") == (["CSQU3054383"], "40HC", [True])
+    assert tokenize_row("CSQU3054384")[2] == [False]
+    containers = pd.Series(["CSQU3054383", "CSQU3054384", "MSCU123456", "C5QU3054383"])
+    assert iso6346_check_ok(containers).tolist() == [True, False, False, False]